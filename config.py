@@ -20,6 +20,43 @@ class Config:
     WP_URL = os.getenv("WP_URL", "")
     WP_USER = os.getenv("WP_USER", "")
     WP_APP_PASSWORD = os.getenv("WP_APP_PASSWORD", "")
+    WP_POST_INDEX_CACHE = os.getenv("WP_POST_INDEX_CACHE", "")  # Optional JSON cache file
+    WP_INDEX_WORKERS = int(os.getenv("WP_INDEX_WORKERS", "4"))
+    WP_INDEX_RECONCILE_INTERVAL = int(os.getenv("WP_INDEX_RECONCILE_INTERVAL", "3600"))  # Seconds between trash/delete checks
+    WP_SITES_FILE = os.getenv("WP_SITES_FILE", "")  # Optional JSON registry of additional client sites
+    WP_AUTH_CACHE_TTL = int(os.getenv("WP_AUTH_CACHE_TTL", "600"))  # Seconds to trust a successful credential check
+    WP_AUTH_RETRY_TTL = int(os.getenv("WP_AUTH_RETRY_TTL", "30"))  # Seconds before a failed check is retried
+    
+    # Image preprocessing before upload_media
+    MEDIA_VARIANT_WIDTHS = [int(w) for w in os.getenv("MEDIA_VARIANT_WIDTHS", "1600,1024,480").split(",") if w.strip()]
+    MEDIA_JPEG_QUALITY = int(os.getenv("MEDIA_JPEG_QUALITY", "82"))
+    MEDIA_CACHE_DIR = os.getenv("MEDIA_CACHE_DIR", "data/media")
+    MEDIA_ATTACHMENTS_DIR = os.getenv("MEDIA_ATTACHMENTS_DIR", "data/attachments")  # Only attachments under here are used; empty = none
+    MEDIA_PROCESS_WORKERS = int(os.getenv("MEDIA_PROCESS_WORKERS", "0"))  # 0 = one per CPU
+    
+    # Near-duplicate detection (skip or flag content similar to what was already published)
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_ACTION = os.getenv("DEDUP_ACTION", "skip").lower()  # "skip" or "flag"
+    DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", "5"))  # Bits, at most 6
+    DEDUP_INDEX_PATH = os.getenv("DEDUP_INDEX_PATH", "")  # Optional append-only log to persist the index
+    
+    # Dashboard server (ASGI launcher in dashboard_asgi.py)
+    DASHBOARD_HOST = os.getenv("DASHBOARD_HOST", "0.0.0.0")
+    DASHBOARD_PORT = int(os.getenv("DASHBOARD_PORT", "5000"))
+    DASHBOARD_IO_THREADS = int(os.getenv("DASHBOARD_IO_THREADS", "32"))  # Threads for blocking API calls (single worker)
+    
+    # Logging
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # "text" or "json"
+    LOG_FILE = os.getenv("LOG_FILE", "")  # Empty = stderr
+    DASHBOARD_LOG_LEVEL = os.getenv("DASHBOARD_LOG_LEVEL", "INFO").upper()
+    
+    # Job tracing (opt-in): append every integration call of every job to this file
+    TRACE_PATH = os.getenv("TRACE_PATH", "")
+    
+    # Job history (bodies are compressed to disk and fetched on demand)
+    CONTENT_STORE_DIR = os.getenv("CONTENT_STORE_DIR", "data/content")
+    JOB_HISTORY_LIMIT = int(os.getenv("JOB_HISTORY_LIMIT", "50"))
     
     # Email/SMTP
     SMTP_EMAIL = os.getenv("SMTP_EMAIL", "")
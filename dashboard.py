@@ -1,11 +1,15 @@
 """
 Auto-Content-Bot Dashboard
 A simple web interface to trigger and monitor content automation workflows.
+
+The request handling lives in plain functions returning `(payload, status_code)`
+so the async ASGI variant (`dashboard_asgi.py`) can share them.
 """
 from flask import Flask, render_template, request, jsonify
 from flask_cors import CORS
 import threading
 import json
+import logging
 from datetime import datetime
 
 from main import run_pipeline, demo_mode
@@ -14,21 +18,33 @@ from services.gmail_listener import GmailListener
 from services.ai_engine import AIEngine
 from services.wp_publisher import WordPressPublisher
 from services.social_manager import SocialMediaManager
+from services.job_store import get_job_store
+from services.site_registry import get_site_registry
+from services.logger import SUCCESS, CallbackSink, add_sink, get_logger, job_context
 
 app = Flask(__name__)
 CORS(app)
 
 # Store execution logs
 execution_logs = []
-current_task = None
+current_task = None  # JobRecord of the latest pipeline run
+_task_lock = threading.Lock()
+job_store = get_job_store()
 
 
-def add_log(message: str, level: str = "info"):
-    """Add a log entry with timestamp."""
+log = get_logger("dashboard")
+
+LOG_LEVELS = {"info": logging.INFO, "success": SUCCESS, "warning": logging.WARNING, "error": logging.ERROR}
+DASHBOARD_LEVELS = {SUCCESS: "success", logging.WARNING: "warning", logging.ERROR: "error", logging.CRITICAL: "error"}
+
+
+def _store_log(record: logging.LogRecord):
+    """Log sink: append a record to the dashboard log store (runs on the logging thread)."""
     log_entry = {
-        "timestamp": datetime.now().strftime("%H:%M:%S"),
-        "level": level,
-        "message": message
+        "timestamp": datetime.fromtimestamp(record.created).strftime("%H:%M:%S"),
+        "level": DASHBOARD_LEVELS.get(record.levelno, "info"),
+        "message": record.getMessage(),
+        "job_id": record.job_id
     }
     execution_logs.append(log_entry)
     # Keep only last 100 logs
@@ -36,17 +52,22 @@ def add_log(message: str, level: str = "info"):
         execution_logs.pop(0)
 
 
-@app.route('/')
-def dashboard():
-    """Render the main dashboard page."""
-    return render_template('dashboard.html')
+add_sink(CallbackSink(_store_log, level=Config.DASHBOARD_LOG_LEVEL))
 
 
-@app.route('/api/status')
-def get_status():
-    """Get current system status and configuration."""
+def add_log(message: str, level: str = "info"):
+    """Log a dashboard message; it reaches the log store through the dashboard sink."""
+    log.log(LOG_LEVELS.get(level, logging.INFO), "%s", message)
+
+
+# ---------------------------------------------------------------------------
+# Handlers shared by the WSGI (Flask) and ASGI (Quart) apps
+# ---------------------------------------------------------------------------
+
+def build_status() -> dict:
+    """Current system status and configuration."""
     status = Config.get_status()
-    return jsonify({
+    return {
         "status": "online",
         "demo_mode": status["demo_mode"],
         "integrations": {
@@ -56,70 +77,59 @@ def get_status():
             "linkedin": {"connected": status["linkedin"], "name": "LinkedIn"},
             "twitter": {"connected": status["twitter"], "name": "Twitter/X"}
         },
-        "current_task": current_task,
+        "current_task": current_task.summary() if current_task else None,
         "logs": execution_logs[-20:]  # Last 20 logs
-    })
+    }
 
 
-@app.route('/api/run', methods=['POST'])
-def run_automation():
-    """Trigger the content automation pipeline."""
+def start_pipeline(data: dict):
+    """Start the content pipeline in a background thread."""
     global current_task
-    
-    data = request.get_json() or {}
+
     use_demo = data.get('demo', True)
     custom_email = data.get('email', None)
-    
-    if current_task and current_task.get('status') == 'running':
-        return jsonify({"error": "A task is already running"}), 400
-    
-    current_task = {
-        "id": datetime.now().strftime("%Y%m%d%H%M%S"),
-        "status": "running",
-        "started_at": datetime.now().isoformat(),
-        "type": "demo" if use_demo else "production"
-    }
-    
-    add_log("🚀 Starting content automation pipeline...", "info")
-    
+
+    with _task_lock:
+        if current_task and current_task.status == 'running':
+            return {"error": "A task is already running"}, 400
+
+        current_task = task = job_store.create("demo" if use_demo else "production")
+
+    with job_context(task.id):
+        add_log("🚀 Starting content automation pipeline...", "info")
+
     def execute_pipeline():
-        global current_task
-        try:
-            if custom_email:
-                add_log(f"📧 Processing custom email: {custom_email.get('subject', 'N/A')}", "info")
-                results = run_pipeline(custom_email=custom_email)
-            elif use_demo:
-                add_log("🎮 Running in demo mode with sample data", "info")
-                results = demo_mode()
-            else:
-                add_log("📩 Checking for new emails...", "info")
-                results = run_pipeline()
-            
-            current_task["status"] = "completed"
-            current_task["results"] = results
-            current_task["completed_at"] = datetime.now().isoformat()
-            add_log("✅ Pipeline completed successfully!", "success")
-            
-        except Exception as e:
-            current_task["status"] = "failed"
-            current_task["error"] = str(e)
-            add_log(f"❌ Pipeline failed: {str(e)}", "error")
-    
+        with job_context(task.id):
+            try:
+                if custom_email:
+                    add_log(f"📧 Processing custom email: {custom_email.get('subject', 'N/A')}", "info")
+                    results = run_pipeline(custom_email=custom_email)
+                elif use_demo:
+                    add_log("🎮 Running in demo mode with sample data", "info")
+                    results = demo_mode()
+                else:
+                    add_log("📩 Checking for new emails...", "info")
+                    results = run_pipeline()
+
+                job_store.complete(task, results)
+                add_log("✅ Pipeline completed successfully!", "success")
+
+            except Exception as e:
+                job_store.fail(task, e)
+                add_log(f"❌ Pipeline failed: {str(e)}", "error")
+
     # Run in background thread
     thread = threading.Thread(target=execute_pipeline)
     thread.start()
-    
-    return jsonify({
+
+    return {
         "message": "Pipeline started",
-        "task_id": current_task["id"]
-    })
+        "task_id": task.id
+    }, 200
 
 
-@app.route('/api/preview', methods=['POST'])
-def preview_content():
-    """Preview AI-generated content without publishing."""
-    data = request.get_json() or {}
-    
+def preview(data: dict):
+    """Generate a full content package without publishing (blocking)."""
     email_data = {
         "id": "preview",
         "sender": "preview@dashboard.local",
@@ -127,38 +137,36 @@ def preview_content():
         "body": data.get('body', 'Generate sample content'),
         "thread_id": "preview_thread"
     }
-    
+
     add_log(f"👁️ Generating preview for: {email_data['subject']}", "info")
-    
+
     try:
         ai_service = AIEngine()
         content = ai_service.generate_content_package(email_data)
         add_log("✅ Preview generated successfully", "success")
-        
-        return jsonify({
+
+        return {
             "status": "success",
             "content": content
-        })
+        }, 200
     except Exception as e:
         add_log(f"❌ Preview failed: {str(e)}", "error")
-        return jsonify({"error": str(e)}), 500
+        return {"error": str(e)}, 500
 
 
-@app.route('/api/generate', methods=['POST'])
-def generate_single():
-    """Generate a single content type."""
-    data = request.get_json() or {}
+def generate(data: dict):
+    """Generate a single content type (blocking)."""
     content_type = data.get('type', 'blog_post')
     request_text = data.get('request', '')
-    
+
     if not request_text:
-        return jsonify({"error": "Request text is required"}), 400
-    
+        return {"error": "Request text is required"}, 400
+
     add_log(f"📝 Generating {content_type}...", "info")
-    
+
     try:
         ai_service = AIEngine()
-        
+
         if content_type == 'blog_post':
             result = ai_service.generate_blog_post(request_text)
         elif content_type == 'case_study':
@@ -169,52 +177,192 @@ def generate_single():
         elif content_type == 'product_description':
             result = ai_service.generate_product_description(request_text)
         else:
-            return jsonify({"error": f"Unknown content type: {content_type}"}), 400
-        
+            return {"error": f"Unknown content type: {content_type}"}, 400
+
         add_log(f"✅ {content_type} generated", "success")
-        return jsonify({"status": "success", "content": result})
-        
+        return {"status": "success", "content": result}, 200
+
     except Exception as e:
         add_log(f"❌ Generation failed: {str(e)}", "error")
-        return jsonify({"error": str(e)}), 500
+        return {"error": str(e)}, 500
 
 
-@app.route('/api/publish', methods=['POST'])
-def publish_content():
-    """Publish content to a specific platform."""
-    data = request.get_json() or {}
+def publish(data: dict):
+    """Publish content to a specific platform (blocking)."""
     platform = data.get('platform', '')
     content = data.get('content', {})
-    
+
     add_log(f"📤 Publishing to {platform}...", "info")
-    
+
     try:
         if platform == 'wordpress':
-            wp_service = WordPressPublisher()
+            try:
+                site = get_site_registry().get(data.get('site'))
+            except KeyError:
+                return {"error": f"Unknown site: {data.get('site')}"}, 404
+            wp_service = WordPressPublisher(site)
             title = content.get('title', 'Untitled')
             body = content.get('content', '')
             link = wp_service.create_draft(title, body)
             result = {"platform": "wordpress", "link": link}
-            
+
         elif platform == 'linkedin':
             social_service = SocialMediaManager()
             text = content.get('text', '')
             result = social_service.post_to_linkedin(text)
-            
+
         elif platform == 'twitter':
             social_service = SocialMediaManager()
             text = content.get('text', '')
             result = social_service.post_to_twitter(text)
-            
+
         else:
-            return jsonify({"error": f"Unknown platform: {platform}"}), 400
-        
+            return {"error": f"Unknown platform: {platform}"}, 400
+
         add_log(f"✅ Published to {platform}", "success")
-        return jsonify({"status": "success", "result": result})
-        
+        return {"status": "success", "result": result}, 200
+
     except Exception as e:
         add_log(f"❌ Publishing failed: {str(e)}", "error")
-        return jsonify({"error": str(e)}), 500
+        return {"error": str(e)}, 500
+
+
+def list_posts(args):
+    """List WordPress posts from the local post index, or look one up by title/slug."""
+    status = args.get('status', 'any')
+    per_page = min(args.get('per_page', 20, type=int), 100)
+    page = max(args.get('page', 1, type=int), 1)
+    title = args.get('title')
+    slug = args.get('slug')
+
+    try:
+        site = get_site_registry().get(args.get('site'))
+    except KeyError:
+        return {"error": f"Unknown site: {args.get('site')}"}, 404
+
+    try:
+        wp_service = WordPressPublisher(site)
+
+        if title:
+            posts = wp_service.find_posts_by_title(title)
+        elif slug:
+            post = wp_service.find_post_by_slug(slug)
+            posts = [post] if post else []
+        else:
+            posts = wp_service.get_posts(status=status, per_page=per_page, page=page)
+
+        return {
+            "posts": posts,
+            "total": len(wp_service.post_index),
+            "page": page,
+            "per_page": per_page,
+            "site": wp_service.site.name
+        }, 200
+    except Exception as e:
+        add_log(f"❌ Fetching posts failed: {str(e)}", "error")
+        return {"error": str(e)}, 500
+
+
+def list_jobs(args):
+    """Summaries of recent pipeline runs."""
+    limit = min(args.get('limit', 20, type=int), 100)
+    return {"jobs": [job.summary() for job in job_store.recent(limit)]}, 200
+
+
+def get_job(job_id: str):
+    """Summary of one pipeline run."""
+    job = job_store.get(job_id)
+    if job is None:
+        return {"error": f"Unknown job: {job_id}"}, 404
+    return job.summary(), 200
+
+
+def job_content(job_id: str, content_type: str):
+    """Load one stored content body of a job (blocking disk read)."""
+    try:
+        content = job_store.load_content(job_id, content_type)
+    except KeyError:
+        return {"error": f"No {content_type} content for job {job_id}"}, 404
+    return {"job_id": job_id, "type": content_type, "content": content}, 200
+
+
+def clear_execution_logs():
+    """Clear execution logs in place (the list is shared with the ASGI app)."""
+    execution_logs.clear()
+    add_log("🧹 Logs cleared", "info")
+    return {"status": "cleared"}
+
+
+# ---------------------------------------------------------------------------
+# Flask routes
+# ---------------------------------------------------------------------------
+
+@app.route('/')
+def dashboard():
+    """Render the main dashboard page."""
+    return render_template('dashboard.html')
+
+
+@app.route('/api/status')
+def get_status():
+    """Get current system status and configuration."""
+    return jsonify(build_status())
+
+
+@app.route('/api/run', methods=['POST'])
+def run_automation():
+    """Trigger the content automation pipeline."""
+    payload, code = start_pipeline(request.get_json() or {})
+    return jsonify(payload), code
+
+
+@app.route('/api/preview', methods=['POST'])
+def preview_content():
+    """Preview AI-generated content without publishing."""
+    payload, code = preview(request.get_json() or {})
+    return jsonify(payload), code
+
+
+@app.route('/api/generate', methods=['POST'])
+def generate_single():
+    """Generate a single content type."""
+    payload, code = generate(request.get_json() or {})
+    return jsonify(payload), code
+
+
+@app.route('/api/publish', methods=['POST'])
+def publish_content():
+    """Publish content to a specific platform."""
+    payload, code = publish(request.get_json() or {})
+    return jsonify(payload), code
+
+
+@app.route('/api/posts')
+def get_posts():
+    """List WordPress posts from the local post index, or look one up by title/slug."""
+    payload, code = list_posts(request.args)
+    return jsonify(payload), code
+
+
+@app.route('/api/jobs')
+def get_jobs():
+    """List recent pipeline runs."""
+    payload, code = list_jobs(request.args)
+    return jsonify(payload), code
+
+
+@app.route('/api/jobs/<job_id>')
+def get_job_summary(job_id):
+    """Get the summary of one pipeline run."""
+    payload, code = get_job(job_id)
+    return jsonify(payload), code
+
+
+@app.route('/api/jobs/<job_id>/content/<content_type>')
+def get_job_content(job_id, content_type):
+    """Fetch a generated content body (or the source email) on demand."""
+    payload, code = job_content(job_id, content_type)
+    return jsonify(payload), code
 
 
 @app.route('/api/logs')
@@ -226,10 +374,7 @@ def get_logs():
 @app.route('/api/clear-logs', methods=['POST'])
 def clear_logs():
     """Clear execution logs."""
-    global execution_logs
-    execution_logs = []
-    add_log("🧹 Logs cleared", "info")
-    return jsonify({"status": "cleared"})
+    return jsonify(clear_execution_logs())
 
 
 if __name__ == '__main__':
@@ -238,6 +383,7 @@ if __name__ == '__main__':
     print("="*60)
     print("Starting web server...")
     print("Open http://localhost:5000 in your browser")
+    print("For production / concurrent use: python dashboard_asgi.py")
     print("="*60 + "\n")
-    
+
     app.run(debug=True, port=5000)
@@ -0,0 +1,139 @@
+"""
+Auto-Content-Bot Dashboard (ASGI)
+Async variant of `dashboard.py` served by Hypercorn.
+
+Generation and publishing handlers await the (blocking) integrations on a
+bounded thread pool, so the event loop keeps answering `/api/status` polls
+while previews and publishes are in flight.
+
+Production launch (always one worker process):
+    python dashboard_asgi.py
+    # or: hypercorn dashboard_asgi:app --bind 0.0.0.0:5000
+
+Do not run it with `--workers` > 1: the running-task guard, job history,
+logs and the post/duplicate indexes live in process memory, so separate
+workers would run pipelines concurrently and overwrite each other's index
+files. Concurrency comes from the event loop and the integration thread pool.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from quart import Quart, render_template, request, jsonify
+from quart_cors import cors
+
+import dashboard
+from config import Config
+
+app = Quart(__name__)
+app = cors(app)
+
+
+@app.before_serving
+async def configure_executor():
+    """Bound the pool that blocking integration calls run on."""
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(
+        ThreadPoolExecutor(max_workers=Config.DASHBOARD_IO_THREADS, thread_name_prefix="integration")
+    )
+
+
+async def _json_body() -> dict:
+    return await request.get_json(silent=True) or {}
+
+
+@app.route('/')
+async def index():
+    """Render the main dashboard page."""
+    return await render_template('dashboard.html')
+
+
+@app.route('/api/status')
+async def get_status():
+    """Get current system status and configuration."""
+    return jsonify(dashboard.build_status())
+
+
+@app.route('/api/run', methods=['POST'])
+async def run_automation():
+    """Trigger the content automation pipeline."""
+    payload, code = dashboard.start_pipeline(await _json_body())
+    return jsonify(payload), code
+
+
+@app.route('/api/preview', methods=['POST'])
+async def preview_content():
+    """Preview AI-generated content without publishing."""
+    payload, code = await asyncio.to_thread(dashboard.preview, await _json_body())
+    return jsonify(payload), code
+
+
+@app.route('/api/generate', methods=['POST'])
+async def generate_single():
+    """Generate a single content type."""
+    payload, code = await asyncio.to_thread(dashboard.generate, await _json_body())
+    return jsonify(payload), code
+
+
+@app.route('/api/publish', methods=['POST'])
+async def publish_content():
+    """Publish content to a specific platform."""
+    payload, code = await asyncio.to_thread(dashboard.publish, await _json_body())
+    return jsonify(payload), code
+
+
+@app.route('/api/posts')
+async def get_posts():
+    """List WordPress posts from the local post index, or look one up by title/slug."""
+    payload, code = await asyncio.to_thread(dashboard.list_posts, request.args)
+    return jsonify(payload), code
+
+
+@app.route('/api/jobs')
+async def get_jobs():
+    """List recent pipeline runs."""
+    payload, code = dashboard.list_jobs(request.args)
+    return jsonify(payload), code
+
+
+@app.route('/api/jobs/<job_id>')
+async def get_job_summary(job_id):
+    """Get the summary of one pipeline run."""
+    payload, code = dashboard.get_job(job_id)
+    return jsonify(payload), code
+
+
+@app.route('/api/jobs/<job_id>/content/<content_type>')
+async def get_job_content(job_id, content_type):
+    """Fetch a generated content body (or the source email) on demand."""
+    payload, code = await asyncio.to_thread(dashboard.job_content, job_id, content_type)
+    return jsonify(payload), code
+
+
+@app.route('/api/logs')
+async def get_logs():
+    """Get execution logs."""
+    return jsonify({"logs": dashboard.execution_logs})
+
+
+@app.route('/api/clear-logs', methods=['POST'])
+async def clear_logs():
+    """Clear execution logs."""
+    return jsonify(dashboard.clear_execution_logs())
+
+
+if __name__ == '__main__':
+    from hypercorn.config import Config as HypercornConfig
+    from hypercorn.run import run
+
+    print("\n" + "="*60)
+    print("🌐 AUTO-CONTENT-BOT DASHBOARD (ASGI)")
+    print("="*60)
+    print(f"Integration threads: {Config.DASHBOARD_IO_THREADS}")
+    print(f"Open http://localhost:{Config.DASHBOARD_PORT} in your browser")
+    print("="*60 + "\n")
+
+    server_config = HypercornConfig()
+    server_config.application_path = "dashboard_asgi:app"
+    server_config.bind = [f"{Config.DASHBOARD_HOST}:{Config.DASHBOARD_PORT}"]
+    server_config.workers = 1  # Job state is per-process; see module docstring
+    run(server_config)
@@ -6,11 +6,26 @@ from services.gmail_listener import GmailListener
 from services.ai_engine import AIEngine
 from services.wp_publisher import WordPressPublisher
 from services.social_manager import SocialMediaManager
+from services.dedup_index import get_dedup_index
+from services.site_registry import get_site_registry
+from services.media_pipeline import MediaPipeline, is_image, resolve_attachment
+from services.tracer import JobTracer, TraceReplayer, untraced
+from services.logger import SUCCESS, get_logger, job_context
 from config import Config
 
+log = get_logger(__name__)
+
+# Duplicate-index channel of each published content type
+CONTENT_CHANNELS = {
+    "blog_post": "wordpress",
+    "case_study": "wordpress",
+    "social_post": "linkedin",
+    "twitter_post": "twitter",
+}
+
 
 def print_banner():
-    """Display startup banner with configuration status."""
+    """Display CLI startup banner with configuration status."""
     print("\n" + "="*60)
     print("🤖 AUTO-CONTENT-BOT - AI Content Automation System")
     print("="*60)
@@ -28,36 +43,79 @@ def print_banner():
     print("="*60 + "\n")
 
 
-def run_pipeline(custom_email: dict = None):
+def run_pipeline(custom_email: dict = None, trace_path: str = None,
+                 replay_path: str = None, latency_scale: float = 1.0):
     """
     Main execution function for the Auto-Content-Bot.
     Orchestrates the flow: Email -> AI -> CMS -> Social Media -> Report.
     
     Args:
         custom_email: Optional custom email data to process (for testing/dashboard)
+        trace_path: Append every integration call of this job to a trace file
+            (defaults to Config.TRACE_PATH; tracing is off when both are empty)
+        replay_path: Run against the most recent job recorded in this trace
+            instead of the real integrations (no network)
+        latency_scale: Multiplier for recorded latencies during replay (0 = instant)
     
     Returns:
         dict: Pipeline execution results
     """
-    print_banner()
-    print("🚀 Starting Content Pipeline...\n")
+    with job_context() as job_id:
+        log.info("Starting content pipeline (%s)", "DEMO MODE" if Config.DEMO_MODE else "PRODUCTION MODE")
+
+        tracer = replayer = None
+        trace_path = trace_path or Config.TRACE_PATH
+        if replay_path:
+            replayer = TraceReplayer(replay_path, latency_scale=latency_scale)
+            custom_email = custom_email or replayer.email
+        elif trace_path:
+            # Tracing is diagnostics only: if the file cannot be opened, run untraced
+            try:
+                tracer = JobTracer(trace_path, job_id=job_id, email=custom_email)
+                log.info("Recording trace to %s", trace_path)
+            except OSError as e:
+                log.warning("Could not open trace %s, running untraced: %s", trace_path, e)
+
+        def make_service(name: str, factory):
+            """Real service, traced proxy, or replay stand-in for one integration."""
+            if replayer:
+                return replayer.service(name)
+            service = factory()
+            return tracer.wrap(service, name) if tracer else service
+
+        try:
+            results = _execute_pipeline(make_service, custom_email)
+        except Exception as e:
+            if tracer:
+                tracer.close(e)
+            raise
+
+        if tracer:
+            tracer.close()
+        if replayer and replayer.remaining():
+            log.warning("%d recorded calls were not used - the run diverged", replayer.remaining())
+        return results
+
 
+def _execute_pipeline(make_service, custom_email: dict = None):
+    """Pipeline body; every integration is obtained through `make_service`."""
     # 1. INITIALIZATION
-    email_service = GmailListener()
-    ai_service = AIEngine()
-    wp_service = WordPressPublisher()
-    social_service = SocialMediaManager()
+    email_service = make_service("gmail", GmailListener)
+    ai_service = make_service("ai", AIEngine)
+    social_service = make_service("social", SocialMediaManager)
 
     # 2. CHECK FOR TASKS (Input)
     email_data = custom_email or email_service.check_new_emails()
     
     if not email_data:
-        print("📭 No new tasks found. Exiting.")
+        log.info("No new tasks found")
         return {"status": "no_tasks", "message": "No new emails to process"}
 
-    print(f"\n📧 Processing: {email_data['subject']}")
-    print(f"   From: {email_data['sender']}")
-    print("-" * 50)
+
+    # Route the job to its client site (subject tag / sender / default)
+    site = get_site_registry().route(email_data)
+    wp_service = make_service("wordpress", lambda: WordPressPublisher(site))
+    log.info("Processing '%s' from %s for site %s", email_data['subject'], email_data['sender'], site.name)
 
     # 3. GENERATE CONTENT (Processing)
     content_package = ai_service.generate_content_package(email_data)
@@ -65,49 +123,128 @@ def run_pipeline(custom_email: dict = None):
     # 4. PUBLISH CONTENT (Output)
     results = {
         "status": "success",
+        "site": site.name,
         "email": email_data,
         "generated_content": {},
-        "published": {}
+        "published": {},
+        "duplicates": {}
     }
 
-    # Step A: Publish to WordPress
-    if "blog_post" in content_package:
-        blog = content_package["blog_post"]
-        draft_link = wp_service.create_draft(blog["title"], blog["content"])
-        results["published"]["wordpress"] = {
-            "type": "blog_post",
-            "title": blog["title"],
-            "link": draft_link
-        }
-        results["generated_content"]["blog_post"] = blog
-
-    if "case_study" in content_package:
-        case = content_package["case_study"]
-        case_link = wp_service.create_draft(case["title"], case["content"])
-        results["published"]["wordpress_case_study"] = {
-            "type": "case_study",
-            "title": case["title"],
-            "link": case_link
-        }
-        results["generated_content"]["case_study"] = case
-
-    # Step B: Publish to Social Media
-    if "social_post" in content_package:
-        linkedin_result = social_service.post_to_linkedin(content_package["social_post"])
-        results["published"]["linkedin"] = linkedin_result
-        results["generated_content"]["social_post"] = content_package["social_post"]
-
-    if "twitter_post" in content_package:
-        twitter_result = social_service.post_to_twitter(content_package["twitter_post"])
-        results["published"]["twitter"] = twitter_result
-        results["generated_content"]["twitter_post"] = content_package["twitter_post"]
-
-    if "product_description" in content_package:
-        results["generated_content"]["product_description"] = content_package["product_description"]
+    # One index per channel: the same announcement on LinkedIn and Twitter is not a duplicate
+    dedup_indexes = {
+        channel: make_service(f"dedup.{channel}", lambda channel=channel: get_dedup_index(site.name, channel))
+        for channel in dict.fromkeys(CONTENT_CHANNELS.values())
+    } if Config.DEDUP_ENABLED else {}
+    # Entries are stored only after publishing, and posts created by this job
+    # are excluded from lookups, so a job never matches its own output
+    pending = []
+    created_posts = set()
+
+    def should_publish(key: str, text: str, title: str = None) -> bool:
+        """Check content against existing posts before calling any publish API."""
+        if not dedup_indexes:
+            return True
+
+        if title and any(p["id"] not in created_posts for p in wp_service.find_posts_by_title(title)):
+            match = {"label": f"[{site.name}] {title}", "distance": 0}
+        else:
+            match = dedup_indexes[CONTENT_CHANNELS[key]].find(
+                text, exclude=[f"wp:{post_id}" for post_id in created_posts])
+
+        if match is None:
+            return True
+
+        results["duplicates"][key] = {**match, "action": Config.DEDUP_ACTION}
+        log.warning("%s is a near-duplicate of '%s' (distance %d) - %s",
+                    key, match['label'], match['distance'], Config.DEDUP_ACTION)
+        return Config.DEDUP_ACTION != "skip"
+
+    def remember(key: str, text: str, title: str = None, post_id=None):
+        # WordPress entries are keyed by post ID so the post index sync replaces
+        # them with the published body instead of adding a second fingerprint
+        if post_id:
+            created_posts.add(post_id)
+        if dedup_indexes:
+            label = title or f"{key}: {text[:60]}"
+            pending.append((key, text, f"[{site.name}] {label}", f"wp:{post_id}" if post_id else None))
+
+    def flush_remembered():
+        for key, text, label, entry_key in pending:
+            dedup_indexes[CONTENT_CHANNELS[key]].add(text, label=label, key=entry_key)
+
+    # Image attachments (files saved under MEDIA_ATTACHMENTS_DIR) are resized
+    # and attached to the blog draft; any other path is ignored
+    images = []
+    for path in email_data.get("attachments") or []:
+        resolved = resolve_attachment(path)
+        if resolved is None:
+            log.warning("Ignoring attachment outside %s: %s", Config.MEDIA_ATTACHMENTS_DIR or "(disabled)", path)
+        elif is_image(resolved):
+            images.append(resolved)
+
+    try:
+        # Step A: Publish to WordPress
+        if "blog_post" in content_package:
+            blog = content_package["blog_post"]
+            if should_publish("blog_post", blog["content"], blog["title"]):
+                media = []
+                if images:
+                    media_pipeline = make_service("media", MediaPipeline)
+                    media = media_pipeline.upload(untraced(wp_service), media_pipeline.prepare(images))
+
+                draft_link = wp_service.create_draft(
+                    blog["title"], blog["content"],
+                    featured_media=media[0]["id"] if media else None
+                )
+                post_id = wp_service.last_post_id
+                if media:
+                    wp_service.attach_media(post_id, [m["id"] for m in media])
+
+                results["published"]["wordpress"] = {
+                    "type": "blog_post",
+                    "title": blog["title"],
+                    "link": draft_link,
+                    "media": media
+                }
+                remember("blog_post", blog["content"], blog["title"], post_id)
+            results["generated_content"]["blog_post"] = blog
+
+        if "case_study" in content_package:
+            case = content_package["case_study"]
+            if should_publish("case_study", case["content"], case["title"]):
+                case_link = wp_service.create_draft(case["title"], case["content"])
+                results["published"]["wordpress_case_study"] = {
+                    "type": "case_study",
+                    "title": case["title"],
+                    "link": case_link
+                }
+                remember("case_study", case["content"], case["title"], wp_service.last_post_id)
+            results["generated_content"]["case_study"] = case
+
+        # Step B: Publish to Social Media
+        if "social_post" in content_package:
+            if should_publish("social_post", content_package["social_post"]):
+                linkedin_result = social_service.post_to_linkedin(content_package["social_post"])
+                results["published"]["linkedin"] = linkedin_result
+                remember("social_post", content_package["social_post"])
+            results["generated_content"]["social_post"] = content_package["social_post"]
+
+        if "twitter_post" in content_package:
+            if should_publish("twitter_post", content_package["twitter_post"]):
+                twitter_result = social_service.post_to_twitter(content_package["twitter_post"])
+                results["published"]["twitter"] = twitter_result
+                remember("twitter_post", content_package["twitter_post"])
+            results["generated_content"]["twitter_post"] = content_package["twitter_post"]
+
+        if "product_description" in content_package:
+            results["generated_content"]["product_description"] = content_package["product_description"]
+    finally:
+        flush_remembered()
 
     # 5. REPORTING (Feedback Loop)
     wp_link = results["published"].get("wordpress", {}).get("link", "N/A")
     social_platforms = [k for k in results["published"].keys() if k != "wordpress"]
+    duplicates = results["duplicates"]
     
     report_message = f"""
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -121,6 +258,8 @@ def run_pipeline(custom_email: dict = None):
 
 📱 Social Media: {', '.join(social_platforms) if social_platforms else 'None'}
 
+♻️ Near-Duplicates: {', '.join(f"{k} ({v['action']})" for k, v in duplicates.items()) if duplicates else 'None'}
+
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 Generated by Auto-Content-Bot 🤖
     """
@@ -131,18 +270,14 @@ Generated by Auto-Content-Bot 🤖
         body=report_message
     )
 
-    print("\n" + "="*60)
-    print("🏁 Pipeline finished successfully!")
-    print("="*60)
+    log.log(SUCCESS, "Pipeline finished successfully")
     
     return results
 
 
-def demo_mode():
+def demo_mode(trace_path: str = None):
     """Run a quick demo with sample data."""
-    print("\n" + "*"*60)
-    print("🎮 DEMO MODE - Running with sample data")
-    print("*"*60)
+    log.info("Running demo with sample data")
     
     sample_email = {
         "id": "demo_001",
@@ -166,13 +301,25 @@ Thank you!""",
         "thread_id": "demo_thread_001"
     }
     
-    return run_pipeline(custom_email=sample_email)
+    return run_pipeline(custom_email=sample_email, trace_path=trace_path)
 
 
 if __name__ == "__main__":
-    import sys
-    
-    if len(sys.argv) > 1 and sys.argv[1] == "--demo":
-        demo_mode()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Auto-Content-Bot pipeline")
+    parser.add_argument("--demo", action="store_true", help="Run with sample data")
+    parser.add_argument("--trace", metavar="PATH", help="Record every integration call to a trace file")
+    parser.add_argument("--replay", metavar="PATH", help="Replay the latest job of a trace file (no network)")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Scale recorded latencies during replay (0 = instant)")
+    args = parser.parse_args()
+
+    print_banner()
+
+    if args.replay:
+        run_pipeline(replay_path=args.replay, latency_scale=args.latency_scale)
+    elif args.demo:
+        demo_mode(trace_path=args.trace)
     else:
-        run_pipeline()
+        run_pipeline(trace_path=args.trace)
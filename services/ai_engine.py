@@ -1,16 +1,36 @@
 import time
 
+from services.prompts import PROMPT_TEMPLATES, build_messages, estimate_tokens
+from services.logger import SUCCESS, get_logger
+
+log = get_logger(__name__)
+
 class AIEngine:
     """
     Simulates the OpenAI (GPT-4) API content generation process.
+    Prompts are built from the compiled templates in `services.prompts`.
     """
 
+    def build_prompt(self, content_type, email_data, platform="LinkedIn"):
+        """
+        Returns `(messages, max_tokens)` for one content section.
+        The system message is the shared prefix; only the user message varies.
+        """
+        messages = build_messages(content_type, email_data["subject"], email_data.get("body", ""), platform)
+        return messages, PROMPT_TEMPLATES[content_type].max_output_tokens
+
     def generate_content_package(self, email_data):
         """
         Analyzes the email body and generates appropriate content (Blog & Social).
         """
-        print(f"🤖 [AI] Analyzing request: '{email_data['subject']}'...")
-        print("🤖 [AI] Generating content with GPT-4 model...")
+        log.info("Generating content for: %s", email_data['subject'])
+
+        # In a real app, each of these goes to `openai.chat.completions.create(
+        #     messages=messages, max_tokens=max_tokens)`
+        for content_type in ("blog_post", "social_post"):
+            messages, max_tokens = self.build_prompt(content_type, email_data)
+            prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+            log.debug("%s: ~%d prompt tokens, max %d output", content_type, prompt_tokens, max_tokens)
         
         # Simulating processing time (AI thinking)
         time.sleep(2)
@@ -30,5 +50,5 @@ class AIEngine:
             "social_post": "Big ideas start on green pages! 🌿 Check out our new Recycled Notebook. #Sustainability #EcoFriendly #Stationery"
         }
 
-        print("✅ [AI] Content generation completed.")
+        log.log(SUCCESS, "Content generation completed")
         return generated_content
@@ -0,0 +1,354 @@
+"""
+Near-Duplicate Detection - SimHash index over generated content.
+Flags content that is nearly identical to something already published
+before any WordPress or social media call is made. Each site and channel
+(WordPress, LinkedIn, Twitter) has its own index, so one client's content
+never blocks another's and cross-posting is not a duplicate.
+"""
+import hashlib
+import html
+import json
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import combinations
+
+from config import Config
+from services.logger import get_logger
+from services.site_registry import DEFAULT_SITE
+
+log = get_logger(__name__)
+
+HASH_BITS = 64
+SHINGLE_SIZE = 3
+MIN_KEY_BITS = 16  # Lookup key width; ~N / 65536 false candidates per table
+MAX_DISTANCE = 6  # Beyond this the number of tables needed grows too fast
+COMPACT_MIN_RECORDS = 1000
+
+_TAG_RE = re.compile(r"<[^>]+>")
+# _BIT_TABLES[k] maps a byte to 1 if its bit k is set, else 0 (for bytes.translate)
+_BIT_TABLES = [bytes(value >> k & 1 for value in range(256)) for k in range(8)]
+_WORD_RE = re.compile(r"\w+")
+
+
+def _tokens(text: str) -> list:
+    """Lower-cased words of the text with HTML stripped."""
+    text = html.unescape(_TAG_RE.sub(" ", text or ""))
+    return _WORD_RE.findall(text.lower())
+
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash over word shingles.
+    Similar texts produce fingerprints that differ in only a few bits.
+    """
+    words = _tokens(text)
+    if len(words) >= SHINGLE_SIZE:
+        shingles = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+    else:
+        shingles = words
+
+    # Count set bits per position without a Python loop per shingle: take one
+    # byte position of every digest, map each byte to one of its bits, count
+    digests = b"".join([
+        hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest() for shingle in shingles
+    ])
+    half = len(shingles) / 2
+
+    fingerprint = 0
+    for byte in range(8):
+        column = digests[byte::8]
+        for bit in range(8):
+            if column.translate(_BIT_TABLES[bit]).count(1) > half:
+                fingerprint |= 1 << ((7 - byte) * 8 + bit)  # Digests are big-endian
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints."""
+    return bin(a ^ b).count("1")
+
+
+def _block_layout(max_distance: int):
+    """
+    Split the 64 bits into blocks and pick how many must match exactly.
+
+    Two fingerprints within `max_distance` bits differ in at most that many
+    blocks, so they agree on every block of at least one combination of
+    `blocks - max_distance` blocks. More blocks give wider lookup keys (fewer
+    false candidates per bucket) at the cost of more tables.
+    """
+    for blocks in range(max_distance + 1, HASH_BITS + 1):
+        if (blocks - max_distance) * (HASH_BITS // blocks) >= MIN_KEY_BITS:
+            break
+    width = HASH_BITS // blocks
+    # (shift, width) per block; the last block absorbs the leftover high bits
+    layout = [(i * width, width) for i in range(blocks - 1)]
+    layout.append(((blocks - 1) * width, HASH_BITS - (blocks - 1) * width))
+    return layout, list(combinations(range(blocks), blocks - max_distance))
+
+
+class DedupIndex:
+    """
+    Array-backed SimHash store with permuted lookup tables.
+
+    Fingerprints live in a single `array('Q')`. Each table keys every
+    fingerprint by one combination of its bit blocks (see `_block_layout`) and
+    keeps the keys sorted in an `array('Q')` next to their positions, so a
+    lookup is one binary search per table and only compares against entries
+    that match a whole key (at least 16 bits) instead of scanning the store.
+
+    Entries added with a `key` (e.g. a WordPress post ID) are replaced when
+    added again and can be removed. On disk the index is an append-only JSON
+    lines log that is compacted once it holds mostly stale records.
+    """
+
+    def __init__(self, max_distance: int = 5, path: str = ""):
+        if not 0 <= max_distance <= MAX_DISTANCE:
+            raise ValueError(f"max_distance must be between 0 and {MAX_DISTANCE}")
+
+        self.max_distance = max_distance
+        self.path = path
+
+        self._blocks, self._combos = _block_layout(max_distance)
+        self._hashes = array("Q")
+        self._labels = []  # None marks a removed/replaced entry
+        self._entry_keys = []
+        self._by_key = {}
+        self._live = 0
+        self._tables = [(array("Q"), array("I")) for _ in self._combos]
+        self._log_records = 0
+        self._lock = threading.Lock()
+
+        if path:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._load()
+
+    def _table_keys(self, fingerprint: int):
+        blocks = [(fingerprint >> shift) & ((1 << width) - 1) for shift, width in self._blocks]
+        for table, combo in enumerate(self._combos):
+            key = 0
+            for block in combo:
+                key = (key << self._blocks[block][1]) | blocks[block]
+            yield table, key
+
+    def _insert(self, fingerprint: int, label: str, key=None):
+        if key is not None and key in self._by_key:
+            self._discard(key)
+
+        position = len(self._hashes)
+        self._hashes.append(fingerprint)
+        self._labels.append(label)
+        self._entry_keys.append(key)
+        if key is not None:
+            self._by_key[key] = position
+        self._live += 1
+
+        for table, table_key in self._table_keys(fingerprint):
+            keys, positions = self._tables[table]
+            i = bisect_right(keys, table_key)
+            keys.insert(i, table_key)
+            positions.insert(i, position)
+
+    def _discard(self, key) -> bool:
+        # Table slots of removed entries stay until compaction; lookups skip them
+        position = self._by_key.pop(key, None)
+        if position is None:
+            return False
+        self._labels[position] = None
+        self._live -= 1
+        return True
+
+    def add(self, text: str, label: str = "", key: str = None) -> int:
+        """
+        Fingerprint the text and store it. Returns the fingerprint.
+        An existing entry with the same `key` is replaced.
+        """
+        fingerprint = simhash(text)
+        self.add_fingerprint(fingerprint, label, key)
+        return fingerprint
+
+    def add_fingerprint(self, fingerprint: int, label: str = "", key: str = None):
+        """Store an already computed fingerprint (see `add`)."""
+        with self._lock:
+            if key is not None and key in self._by_key:
+                position = self._by_key[key]
+                if self._hashes[position] == fingerprint and self._labels[position] == label:
+                    return  # Unchanged (e.g. the same post seen by another sync)
+            self._insert(fingerprint, label, key)
+            self._append({"h": format(fingerprint, "016x"), "l": label, "k": key})
+
+    def remove(self, key: str) -> bool:
+        """Forget the entry stored under `key`. Returns False if there is none."""
+        with self._lock:
+            if not self._discard(key):
+                return False
+            self._append({"k": key, "d": 1})
+            return True
+
+    def find(self, text: str, exclude=()):
+        """
+        Return the closest stored match as `{"label", "distance"}`,
+        or None if nothing is within `max_distance` bits.
+        Entries stored under a key in `exclude` are ignored.
+        """
+        if not _tokens(text):
+            return None
+        return self.find_fingerprint(simhash(text), exclude)
+
+    def find_fingerprint(self, fingerprint: int, exclude=()):
+        """`find` for an already computed fingerprint."""
+        best = None
+        with self._lock:
+            seen = {self._by_key[key] for key in exclude if key in self._by_key}
+            for table, table_key in self._table_keys(fingerprint):
+                keys, positions = self._tables[table]
+                i = bisect_left(keys, table_key)
+                while i < len(keys) and keys[i] == table_key:
+                    position = positions[i]
+                    i += 1
+                    if position in seen or self._labels[position] is None:
+                        continue
+                    seen.add(position)
+                    distance = hamming_distance(fingerprint, self._hashes[position])
+                    if distance <= self.max_distance and (best is None or distance < best[1]):
+                        best = (position, distance)
+
+            if best is None:
+                return None
+            return {"label": self._labels[best[0]], "distance": best[1]}
+
+    def __len__(self) -> int:
+        return self._live
+
+    # ----------------------------------------------------------- persistence
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+
+        entries = {}  # Later records for the same key replace earlier ones
+        records = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for number, line in enumerate(f):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    records += 1
+                    try:
+                        record = json.loads(line)
+                        entry_key = record["k"] if record.get("k") is not None else ("line", number)
+                        if record.get("d"):
+                            entries.pop(entry_key, None)
+                        else:
+                            entries[entry_key] = (int(record["h"], 16), record.get("l", ""))
+                    except (ValueError, KeyError, TypeError) as e:
+                        log.warning("Skipping bad record %d in %s: %s", number + 1, self.path, e)
+        except OSError as e:
+            log.warning("Ignoring unreadable index %s: %s", self.path, e)
+            return
+
+        self._bulk_load(entries)
+        self._log_records = records
+
+    def _bulk_load(self, entries: dict):
+        """Rebuild all tables from `{key: (fingerprint, label)}` with one sort per table."""
+        self._hashes = array("Q")
+        self._labels = []
+        self._entry_keys = []
+        self._by_key = {}
+        rows = [[] for _ in self._combos]
+
+        for entry_key, (fingerprint, label) in entries.items():
+            key = entry_key if isinstance(entry_key, str) else None
+            position = len(self._hashes)
+            self._hashes.append(fingerprint)
+            self._labels.append(label)
+            self._entry_keys.append(key)
+            if key is not None:
+                self._by_key[key] = position
+            for table, table_key in self._table_keys(fingerprint):
+                rows[table].append((table_key, position))
+
+        self._live = len(self._hashes)
+        self._tables = []
+        for table_rows in rows:
+            table_rows.sort()
+            self._tables.append((
+                array("Q", [k for k, _ in table_rows]),
+                array("I", [p for _, p in table_rows])
+            ))
+
+    def _live_entries(self) -> dict:
+        return {
+            (key if key is not None else ("entry", position)): (self._hashes[position], label)
+            for position, (label, key) in enumerate(zip(self._labels, self._entry_keys))
+            if label is not None
+        }
+
+    def _append(self, record: dict):
+        """Append one record to the log (called with the lock held)."""
+        if not self.path:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._log_records += 1
+
+        if self._log_records > max(COMPACT_MIN_RECORDS, 2 * self._live):
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the log (and the tables) with live entries only."""
+        entries = self._live_entries()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry_key, (fingerprint, label) in entries.items():
+                key = entry_key if isinstance(entry_key, str) else None
+                f.write(json.dumps({"h": format(fingerprint, "016x"), "l": label, "k": key},
+                                   separators=(",", ":")) + "\n")
+        os.replace(tmp_path, self.path)
+        self._log_records = len(entries)
+        self._bulk_load(entries)
+        log.debug("Compacted %s to %d entries", self.path, len(entries))
+
+
+# Each channel keeps its own entries: cross-posting the same announcement to
+# LinkedIn and Twitter is normal and must not count as a duplicate
+CHANNELS = ("wordpress", "linkedin", "twitter")
+DEFAULT_CHANNEL = "wordpress"
+
+_dedup_indexes = {}
+_dedup_index_lock = threading.Lock()
+
+
+def index_path(site: str, channel: str = DEFAULT_CHANNEL) -> str:
+    """
+    Log file of one site/channel: `DEDUP_INDEX_PATH` for the default site's
+    WordPress index, `<root>[.<site>][.<channel>]<ext>` otherwise.
+    """
+    if not Config.DEDUP_INDEX_PATH:
+        return ""
+    root, ext = os.path.splitext(Config.DEDUP_INDEX_PATH)
+    if site != DEFAULT_SITE:
+        root += "." + re.sub(r"[^\w.-]", "_", site)
+    if channel != DEFAULT_CHANNEL:
+        root += f".{channel}"
+    return f"{root}{ext}"
+
+
+def get_dedup_index(site: str = DEFAULT_SITE, channel: str = DEFAULT_CHANNEL) -> DedupIndex:
+    """Duplicate index of one site and channel, shared across pipeline runs."""
+    if channel not in CHANNELS:
+        raise ValueError(f"Unknown channel: {channel}")
+    with _dedup_index_lock:
+        index = _dedup_indexes.get((site, channel))
+        if index is None:
+            index = _dedup_indexes[(site, channel)] = DedupIndex(
+                max_distance=Config.DEDUP_MAX_DISTANCE,
+                path=index_path(site, channel)
+            )
+        return index
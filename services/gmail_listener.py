@@ -1,5 +1,9 @@
 import time
 
+from services.logger import SUCCESS, get_logger
+
+log = get_logger(__name__)
+
 class GmailListener:
     """
     Simulates the Gmail API interactions using IMAP logic equivalent.
@@ -11,7 +15,7 @@ class GmailListener:
         Simulates checking the inbox for specific task-related emails.
         Returns a dictionary representing a structured email object.
         """
-        print("📩 [GMAIL] Checking inbox for new task requests...")
+        log.info("Checking inbox for new task requests")
         time.sleep(1)  # Simulate network delay
 
         # Mock Email Data
@@ -23,16 +27,13 @@ class GmailListener:
             "body": "We have a new product: 'Recycled Paper Notebook'. Please generate a blog post about the importance of sustainable stationery and a LinkedIn post. Price: $12."
         }
         
-        print(f"📩 [GMAIL] New email found from: {mock_email['sender']}")
+        log.info("New email found from: %s", mock_email['sender'])
         return mock_email
 
     def send_report(self, to_email, subject, body):
         """
         Simulates sending a reporting email via SMTP/Gmail API.
         """
-        print("\n--- 📤 SENDING EMAIL REPORT ---")
-        print(f"To: {to_email}")
-        print(f"Subject: {subject}")
-        print(f"Body: {body}")
-        print("✅ [GMAIL] Email sent successfully.")
-        print("-------------------------------")
+        log.info("Sending report to %s: %s", to_email, subject)
+        log.debug("Report body: %s", body)
+        log.log(SUCCESS, "Report email sent")
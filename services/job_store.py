@@ -0,0 +1,209 @@
+"""
+Job Store - Compact pipeline job records with offloaded content bodies.
+Large payloads (the source email, generated posts) are compressed to disk
+and referenced by hash, so job records and status responses stay small.
+"""
+import hashlib
+import json
+import os
+import threading
+import zlib
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from config import Config
+
+
+class ContentStore:
+    """
+    Content-addressed store: each body is JSON-encoded, zlib-compressed and
+    written once under `<root>/<hash[:2]>/<hash>.json.z`.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.json.z")
+
+    def put(self, content) -> str:
+        """Store content (str/dict/list) and return its hash."""
+        raw = json.dumps(content, separators=(",", ":"), sort_keys=True).encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self._path(digest)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(zlib.compress(raw, 6))
+            os.replace(tmp_path, path)
+
+        return digest
+
+    def get(self, digest: str):
+        """Load content by hash. Raises KeyError if it is not stored."""
+        if not all(c in "0123456789abcdef" for c in digest) or len(digest) != 64:
+            raise KeyError(digest)
+        try:
+            with open(self._path(digest), "rb") as f:
+                return json.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            raise KeyError(digest) from None
+
+    def delete(self, digest: str):
+        """Remove a stored body (no error if it is already gone)."""
+        try:
+            os.remove(self._path(digest))
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> int:
+        """Remove every stored body. Returns the number of files removed."""
+        removed = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith(".json.z"):
+                    os.remove(os.path.join(directory, name))
+                    removed += 1
+        return removed
+
+
+@dataclass(slots=True)
+class JobRecord:
+    """Summary of one pipeline run. Bodies are referenced, never embedded."""
+    id: str
+    type: str
+    status: str = "running"
+    started_at: str = ""
+    completed_at: str = None
+    error: str = None
+    subject: str = ""
+    sender: str = ""
+    site: str = ""
+    published: dict = field(default_factory=dict)
+    duplicates: dict = field(default_factory=dict)
+    content_refs: dict = field(default_factory=dict)
+
+    def summary(self) -> dict:
+        """Small JSON-ready view used by /api/status and /api/jobs."""
+        return {
+            "id": self.id,
+            "type": self.type,
+            "status": self.status,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at,
+            "error": self.error,
+            "subject": self.subject,
+            "sender": self.sender,
+            "site": self.site,
+            "published": self.published,
+            "duplicates": self.duplicates,
+            "content": sorted(self.content_refs),
+        }
+
+
+class JobStore:
+    """
+    Keeps the most recent job records in memory; bodies go to a ContentStore.
+
+    Bodies are shared between jobs by hash and reference-counted, so a body is
+    deleted from disk once the last job referring to it is evicted. Records
+    are not persisted, so bodies left by a previous process are unreachable
+    and removed on startup.
+    """
+
+    def __init__(self, content_store: ContentStore, limit: int = 50):
+        self.content = content_store
+        self.limit = limit
+        self._jobs = OrderedDict()
+        self._refcounts = Counter()
+        self._lock = threading.Lock()
+        self.content.clear()
+
+    def create(self, job_type: str) -> JobRecord:
+        """Register a new running job."""
+        now = datetime.now()
+        job = JobRecord(
+            id=now.strftime("%Y%m%d%H%M%S%f"),
+            type=job_type,
+            started_at=now.isoformat()
+        )
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.limit:
+                _, evicted = self._jobs.popitem(last=False)
+                self._release(evicted.content_refs)
+        return job
+
+    def _release(self, refs: dict):
+        """Drop one reference per body and delete unreferenced ones (lock held)."""
+        for digest in refs.values():
+            self._refcounts[digest] -= 1
+            if self._refcounts[digest] <= 0:
+                del self._refcounts[digest]
+                self.content.delete(digest)
+
+    def complete(self, job: JobRecord, results: dict):
+        """Record pipeline results, offloading the email and generated bodies."""
+        email = results.get("email") or {}
+        bodies = dict(results.get("generated_content") or {})
+        if email:
+            bodies["email"] = email
+
+        # Writing and counting under the lock keeps an eviction from deleting
+        # a shared body between put() and the new reference
+        refs = {}
+        with self._lock:
+            for content_type, body in bodies.items():
+                refs[content_type] = self.content.put(body)
+                self._refcounts[refs[content_type]] += 1
+            if job.id not in self._jobs:  # Evicted while it was running
+                self._release(refs)
+                refs = {}
+
+        job.subject = email.get("subject", "")
+        job.sender = email.get("sender", "")
+        job.site = results.get("site", "")
+        job.published = results.get("published", {})
+        job.duplicates = results.get("duplicates", {})
+        job.content_refs = refs
+        job.status = "completed"
+        job.completed_at = datetime.now().isoformat()
+
+    def fail(self, job: JobRecord, error: Exception):
+        """Mark a job as failed."""
+        job.status = "failed"
+        job.error = str(error)
+        job.completed_at = datetime.now().isoformat()
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def recent(self, limit: int = 20) -> list:
+        """Newest jobs first."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return jobs[::-1][:limit]
+
+    def load_content(self, job_id: str, content_type: str):
+        """Fetch one stored body of a job. Raises KeyError if unknown."""
+        job = self.get(job_id)
+        if job is None or content_type not in job.content_refs:
+            raise KeyError(content_type)
+        return self.content.get(job.content_refs[content_type])
+
+
+_job_store = None
+_job_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """Process-wide job store."""
+    global _job_store
+    with _job_store_lock:
+        if _job_store is None:
+            _job_store = JobStore(ContentStore(Config.CONTENT_STORE_DIR), limit=Config.JOB_HISTORY_LIMIT)
+        return _job_store
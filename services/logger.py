@@ -0,0 +1,151 @@
+"""
+Logging - Structured, queue-backed logging for the whole bot.
+Log calls only enqueue the record; formatting and writing happen on a
+background listener thread. Every record carries the current job ID.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import queue
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+from config import Config
+
+ROOT_LOGGER = "autobot"
+
+# Between INFO and WARNING; rendered green in the dashboard
+SUCCESS = 25
+logging.addLevelName(SUCCESS, "SUCCESS")
+
+_job_id = contextvars.ContextVar("job_id", default="-")
+
+_setup_lock = threading.Lock()
+_listener = None
+_sinks = []
+
+
+def current_job_id() -> str:
+    return _job_id.get()
+
+
+@contextmanager
+def job_context(job_id: str = None):
+    """
+    Tag all log records in this context with a job ID.
+    Without an ID, an enclosing job is kept or a new ID is generated.
+    """
+    if job_id is None:
+        job_id = _job_id.get() if _job_id.get() != "-" else uuid.uuid4().hex[:12]
+    token = _job_id.set(job_id)
+    try:
+        yield job_id
+    finally:
+        _job_id.reset(token)
+
+
+class _JobContextFilter(logging.Filter):
+    """Captures the job ID on the calling thread, before the record is queued."""
+
+    def filter(self, record):
+        record.job_id = _job_id.get()
+        return True
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    Enqueue records unformatted. The stock QueueHandler formats in the calling
+    thread (for pickling to other processes); the queue here is in-process, so
+    the listener can do it.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "job": getattr(record, "job_id", "-"),
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class CallbackSink(logging.Handler):
+    """Hands each record to a callback (e.g. the dashboard log store)."""
+
+    def __init__(self, callback, level=logging.NOTSET):
+        super().__init__(level)
+        self.callback = callback
+
+    def emit(self, record):
+        try:
+            self.callback(record)
+        except Exception:
+            self.handleError(record)
+
+
+class _SinkDispatcher(logging.Handler):
+    """Forwards records to the sinks registered at runtime via add_sink()."""
+
+    def handle(self, record):
+        for sink in list(_sinks):
+            if record.levelno >= sink.level:
+                sink.handle(record)
+        return True
+
+    def emit(self, record):
+        pass
+
+
+def setup_logging():
+    """Install the queue handler and start the listener thread (idempotent)."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        if Config.LOG_FORMAT == "json":
+            formatter = JSONFormatter()
+        else:
+            formatter = logging.Formatter("%(asctime)s %(levelname)-7s [%(job_id)s] %(name)s: %(message)s")
+
+        output = logging.FileHandler(Config.LOG_FILE, encoding="utf-8") if Config.LOG_FILE else logging.StreamHandler()
+        output.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        handler = _DeferredQueueHandler(log_queue)
+        handler.addFilter(_JobContextFilter())
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(Config.LOG_LEVEL)
+        root.addHandler(handler)
+        root.propagate = False
+
+        _listener = QueueListener(log_queue, output, _SinkDispatcher(), respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)  # Flush queued records on exit
+
+
+def add_sink(handler: logging.Handler):
+    """Attach an extra output (runs on the listener thread)."""
+    setup_logging()
+    _sinks.append(handler)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the bot's root, e.g. get_logger(__name__)."""
+    setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
@@ -0,0 +1,214 @@
+"""
+Media Pipeline - Web-sized image variants before upload.
+Resizes, re-encodes and strips metadata from source images in a process
+pool (cached by source hash), then uploads the variants concurrently.
+"""
+import contextvars
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from config import Config
+from services.logger import get_logger
+
+log = get_logger(__name__)
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:  # Pillow is optional; without it originals are uploaded as-is
+    PIL_AVAILABLE = False
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff")
+ROTATED_ORIENTATIONS = (5, 6, 7, 8)  # EXIF orientations that swap width and height
+
+
+def is_image(path: str) -> bool:
+    return path.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def resolve_attachment(path: str, root: str = None):
+    """
+    Real path of an attachment inside the attachments directory, or None.
+
+    Attachment paths come from job data (including `/api/run` request bodies),
+    so only regular files under `MEDIA_ATTACHMENTS_DIR` are accepted; relative
+    paths are taken relative to it and symlinks or `..` cannot escape it.
+    """
+    root = root if root is not None else Config.MEDIA_ATTACHMENTS_DIR
+    if not root or not isinstance(path, str) or not path:
+        return None
+    root = os.path.realpath(root)
+    full_path = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, full_path]) != root or not os.path.isfile(full_path):
+        return None
+    return full_path
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def display_width(path: str) -> int:
+    """Width of an image after EXIF rotation (reads the header only)."""
+    with Image.open(path) as image:
+        width, height = image.size
+        if image.getexif().get(0x0112) in ROTATED_ORIENTATIONS:
+            return height
+        return width
+
+
+def render_variant(source_path: str, width: int, quality: int, out_path: str) -> str:
+    """
+    Write one resized, metadata-free variant of an image.
+    Runs in a worker process, so it must stay a top-level function.
+    """
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)  # Apply orientation before EXIF is dropped
+        if image.width > width:
+            height = round(image.height * width / image.width)
+            image = image.resize((width, height), Image.LANCZOS)
+
+        tmp_path = f"{out_path}.{os.getpid()}.tmp"
+        if out_path.endswith(".png"):
+            image.save(tmp_path, "PNG", optimize=True)
+        else:
+            image.convert("RGB").save(tmp_path, "JPEG", quality=quality, optimize=True, progressive=True)
+        os.replace(tmp_path, out_path)
+
+    return out_path
+
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Shared pool, started on first use so request threads never resize images."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # "spawn" avoids forking a process that already runs request/pipeline threads
+            _process_pool = ProcessPoolExecutor(
+                max_workers=Config.MEDIA_PROCESS_WORKERS or None,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+
+
+def _reset_process_pool(pool: ProcessPoolExecutor):
+    """Discard a broken pool so the next job starts a fresh one."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+class MediaPipeline:
+    """
+    Prepares web-sized variants of images and uploads them to WordPress.
+
+    Variants are cached under `MEDIA_CACHE_DIR` as `<source-hash>-<width>q<quality>.<ext>`,
+    so the same photo attached to several task emails is processed once.
+    """
+
+    def __init__(self, widths=None, quality: int = None, cache_dir: str = None):
+        self.widths = widths or Config.MEDIA_VARIANT_WIDTHS
+        self.quality = quality or Config.MEDIA_JPEG_QUALITY
+        self.cache_dir = cache_dir or Config.MEDIA_CACHE_DIR
+
+    def prepare(self, paths: list) -> dict:
+        """
+        Returns `{source_path: [(width, variant_path), ...]}`, largest first.
+
+        Widths are capped at the source width (images are never upscaled), so
+        a small image yields fewer, distinct variants. Without Pillow each
+        source maps to itself unchanged. Sources Pillow cannot read are
+        skipped; if rendering fails the original is uploaded instead.
+        """
+        if not PIL_AVAILABLE:
+            log.warning("Pillow not installed - uploading originals")
+            return {path: [(None, path)] for path in paths}
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        pool = _get_process_pool()
+        futures = {}
+
+        for path in paths:
+            try:
+                source_hash = file_hash(path)
+                source_width = display_width(path)
+            except Exception as e:
+                log.warning("Skipping unreadable image %s: %s", path, e)
+                continue
+
+            ext = ".png" if path.lower().endswith(".png") else ".jpg"
+            futures[path] = []
+            for width in sorted({min(w, source_width) for w in self.widths}, reverse=True):
+                out_path = os.path.join(self.cache_dir, f"{source_hash[:32]}-{width}q{self.quality}{ext}")
+                if os.path.exists(out_path):
+                    futures[path].append((width, None, out_path))
+                else:
+                    try:
+                        future = pool.submit(render_variant, path, width, self.quality, out_path)
+                    except BrokenProcessPool:
+                        # A worker died during an earlier job; start over with a fresh pool
+                        _reset_process_pool(pool)
+                        pool = _get_process_pool()
+                        future = pool.submit(render_variant, path, width, self.quality, out_path)
+                    futures[path].append((width, future, out_path))
+
+        variants = {}
+        created = cached = 0
+        for path, entries in futures.items():
+            try:
+                for _, future, _ in entries:
+                    if future is not None:
+                        future.result()
+            except BrokenProcessPool as e:
+                log.error("Image worker crashed on %s: %s - uploading the original", path, e)
+                _reset_process_pool(pool)
+                variants[path] = [(None, path)]
+            except Exception as e:
+                log.warning("Could not resize %s: %s - uploading the original", path, e)
+                variants[path] = [(None, path)]
+            else:
+                variants[path] = [(width, out_path) for width, _, out_path in entries]
+                created += sum(1 for _, future, _ in entries if future is not None)
+                cached += sum(1 for _, future, _ in entries if future is None)
+
+        log.info("%d image(s) -> %d new variant(s), %d from cache", len(variants), created, cached)
+        return variants
+
+    def upload(self, wp_service, variants: dict) -> list:
+        """
+        Upload all variants concurrently through the site's connection.
+        Returns `[{"source", "width", "id", "url"}, ...]` in prepare() order.
+        """
+        jobs = [
+            (source, width, variant_path)
+            for source, entries in variants.items()
+            for width, variant_path in entries
+        ]
+        if not jobs:
+            return []
+
+        def upload_one(job):
+            source, width, variant_path = job
+            title = os.path.splitext(os.path.basename(source))[0]
+            media = wp_service.upload_media(variant_path, title=title)
+            return {"source": source, "width": width, "id": media["id"], "url": media["url"]}
+
+        # One context copy per upload so worker threads log with this job's ID
+        contexts = [contextvars.copy_context() for _ in jobs]
+        with ThreadPoolExecutor(max_workers=wp_service.site.site.max_concurrency) as pool:
+            return list(pool.map(lambda ctx, job: ctx.run(upload_one, job), contexts, jobs))
@@ -0,0 +1,378 @@
+"""
+WordPress Post Index - Local cache of the site's posts.
+Pages through the REST API concurrently on first sync, then refreshes
+incrementally so title/slug lookups never re-download the whole site.
+"""
+import html
+import json
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+import requests
+
+from services.logger import get_logger
+
+log = get_logger(__name__)
+
+
+def normalize_title(title: str) -> str:
+    """Normalize a post title for case/whitespace-insensitive lookups."""
+    text = html.unescape(re.sub(r"<[^>]+>", "", title or ""))
+    return " ".join(text.split()).casefold()
+
+
+def _rendered(field) -> str:
+    """Return the plain value of a WordPress `{"rendered": ...}` field."""
+    if isinstance(field, dict):
+        return field.get("rendered", "")
+    return field or ""
+
+
+class PostIndex:
+    """
+    In-memory (optionally disk-backed) index of WordPress posts.
+
+    The first sync fetches page 1 to learn `X-WP-TotalPages`, then fetches the
+    remaining pages in parallel. Later syncs only ask for posts modified after
+    the newest `modified_gmt` fetched from the site (minus `overlap` seconds,
+    since `modified_after` is exclusive and edits can land in the same second),
+    using the stored ETag so an unchanged site answers with `304 Not Modified`.
+
+    Trashed and deleted posts never show up in those queries, so every
+    `reconcile_interval` seconds the known IDs are re-checked and missing ones
+    are dropped.
+
+    With `on_content`, new or modified posts are queued after each sync and a
+    background thread fetches their `content` in batches and passes each post
+    to it (e.g. to fingerprint published bodies), so syncs and lookups never
+    wait for bodies. The index itself never keeps the content. `on_remove`
+    receives the IDs of dropped posts.
+    """
+
+    FIELDS = "id,date_gmt,modified_gmt,slug,status,title,link"
+    EPOCH = "1970-01-01T00:00:00"
+
+    def __init__(self, base_url: str, auth=None, per_page: int = 100,
+                 max_workers: int = 4, cache_path: str = "",
+                 session: requests.Session = None, limit=None,
+                 overlap: int = 300, reconcile_interval: int = 3600,
+                 on_content=None, on_remove=None):
+        self.base_url = base_url
+        self.auth = auth
+        self.per_page = min(per_page, 100)  # WordPress hard limit
+        self.max_workers = max_workers
+        self.cache_path = cache_path
+        self.overlap = overlap
+        self.reconcile_interval = reconcile_interval
+        self.on_content = on_content
+        self.on_remove = on_remove
+
+        if session is None:
+            session = requests.Session()
+            session.auth = auth
+        self.session = session
+        self.limit = limit  # Optional semaphore shared with other callers of the site
+
+        self._posts = {}
+        self._by_title = {}
+        self._by_slug = {}
+        self._last_modified = None  # Sync watermark: newest modified_gmt fetched by sync()
+        self._etag = None
+        self._reconciled_at = 0.0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._content_queue = queue.Queue()
+        self._content_thread = None
+
+        if cache_path:
+            self._load_cache()
+
+    # ---------------------------------------------------------------- sync
+
+    @property
+    def is_synced(self) -> bool:
+        """True once a full sync (or cache load) has populated the index."""
+        return self._last_modified is not None
+
+    def sync(self) -> int:
+        """
+        Bring the index up to date with the site.
+        Returns the number of posts added, updated or removed.
+        """
+        with self._sync_lock:
+            return self._sync()
+
+    def _sync(self) -> int:
+        full = not self.is_synced
+        posts = self._fetch_all() if full else self._fetch_incremental()
+
+        changed = []
+        with self._lock:
+            for post in posts:
+                old = self._posts.get(post.get("id"))
+                if old is None or old.get("modified_gmt") != post.get("modified_gmt"):
+                    changed.append(post)
+                self._store(post)
+
+            # Only posts fetched here move the watermark; add() must not, or
+            # edits made between the last sync and the bot's own post are skipped
+            newest = max((p.get("modified_gmt") or "" for p in posts), default="")
+            watermark = max(newest, self._last_modified or self.EPOCH)
+            advanced = watermark != self._last_modified
+            self._last_modified = watermark
+
+        if self.on_content and changed:
+            self._queue_content([post["id"] for post in changed if "id" in post])
+
+        removed = 0
+        if full:
+            self._reconciled_at = time.monotonic()
+        elif time.monotonic() - self._reconciled_at >= self.reconcile_interval:
+            removed = self._reconcile()
+
+        if changed or removed or advanced:
+            self._save_cache()
+        return len(changed) + removed
+
+    def _request_page(self, page: int, extra: dict = None, headers: dict = None):
+        params = {
+            "per_page": self.per_page,
+            "page": page,
+            "status": "any",
+            "context": "edit",
+            "_fields": self.FIELDS,
+            "orderby": "modified",
+            "order": "desc",
+        }
+        if extra:
+            params.update(extra)
+
+        with self.limit or nullcontext():
+            return self.session.get(
+                f"{self.base_url}/posts",
+                params=params,
+                headers=headers or {},
+                timeout=30
+            )
+
+    def _fetch_all(self) -> list:
+        """Full sync: page 1 first, then all remaining pages concurrently."""
+        log.info("Running full sync of %s", self.base_url)
+        first = self._request_page(1)
+        first.raise_for_status()
+
+        posts = first.json()
+        total_pages = int(first.headers.get("X-WP-TotalPages", 1))
+        self._etag = first.headers.get("ETag")
+
+        if total_pages > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                responses = pool.map(self._request_page, range(2, total_pages + 1))
+                for response in responses:
+                    response.raise_for_status()
+                    posts.extend(response.json())
+
+        log.info("Indexed %d posts (%d pages)", len(posts), total_pages)
+        return posts
+
+    def _fetch_incremental(self) -> list:
+        """Incremental sync: only posts modified since the last sync (plus the overlap window)."""
+        since = datetime.fromisoformat(self._last_modified) - timedelta(seconds=self.overlap)
+        extra = {"modified_after": f"{since.isoformat(timespec='seconds')}Z"}  # modified_gmt is UTC
+        headers = {"If-None-Match": self._etag} if self._etag else None
+
+        first = self._request_page(1, extra, headers)
+        if first.status_code == 304:
+            return []
+        first.raise_for_status()
+
+        posts = first.json()
+        total_pages = int(first.headers.get("X-WP-TotalPages", 1))
+        self._etag = first.headers.get("ETag", self._etag)
+
+        for page in range(2, total_pages + 1):
+            response = self._request_page(page, extra)
+            response.raise_for_status()
+            posts.extend(response.json())
+
+        if posts:
+            log.info("%d posts modified since %s", len(posts), extra["modified_after"])
+        return posts
+
+    def _reconcile(self) -> int:
+        """
+        Drop posts that were trashed or deleted on the site.
+
+        Known IDs are re-requested in batches with `include=`; `status=any`
+        leaves out trashed posts, so anything not returned is gone. Posts added
+        while this runs are not in the snapshot and are never dropped.
+        Returns the number of posts removed.
+        """
+        with self._lock:
+            known = sorted(self._posts)
+
+        batches = [known[i:i + self.per_page] for i in range(0, len(known), self.per_page)]
+
+        def live_ids(batch):
+            extra = {"include": ",".join(map(str, batch)), "_fields": "id"}
+            response = self._request_page(1, extra)
+            response.raise_for_status()
+            return {post["id"] for post in response.json()}
+
+        live = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for ids in pool.map(live_ids, batches):
+                live |= ids
+
+        removed = [post_id for post_id in known if post_id not in live]
+        with self._lock:
+            for post_id in removed:
+                self._remove(post_id)
+        self._reconciled_at = time.monotonic()
+
+        if self.on_remove:
+            for post_id in removed:
+                self.on_remove(post_id)
+
+        if removed:
+            log.info("Removed %d trashed/deleted posts from the index", len(removed))
+        return len(removed)
+
+    # --------------------------------------------------------- content backfill
+
+    def _queue_content(self, post_ids: list):
+        for post_id in post_ids:
+            self._content_queue.put(post_id)
+        with self._lock:
+            if self._content_thread is None or not self._content_thread.is_alive():
+                self._content_thread = threading.Thread(
+                    target=self._content_worker, name="post-content", daemon=True)
+                self._content_thread.start()
+
+    def _content_worker(self):
+        """Fetch queued posts' content in batches and hand each post to on_content."""
+        while True:
+            batch = [self._content_queue.get()]
+            while len(batch) < self.per_page:
+                try:
+                    batch.append(self._content_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                extra = {"include": ",".join(map(str, batch)), "_fields": "id,title,content"}
+                response = self._request_page(1, extra)
+                response.raise_for_status()
+                for post in response.json():
+                    self.on_content(post)
+            except Exception as e:
+                log.warning("Fetching content of %d posts failed: %s", len(batch), e)
+            finally:
+                for _ in batch:
+                    self._content_queue.task_done()
+
+    def wait_for_content(self):
+        """Block until every queued post has been passed to on_content."""
+        self._content_queue.join()
+
+    # ------------------------------------------------------------- storage
+
+    def add(self, post: dict):
+        """
+        Add or update a single post (e.g. right after creating it).
+        Does not move the sync watermark; the next sync still fetches
+        everything modified on the site since the previous one.
+        """
+        with self._lock:
+            self._store(post)
+
+    def _store(self, post: dict):
+        post_id = post.get("id")
+        if post_id is None:
+            return
+
+        if "content" in post:
+            post = {k: v for k, v in post.items() if k != "content"}
+
+        self._remove(post_id)
+        self._posts[post_id] = post
+        self._by_title.setdefault(normalize_title(_rendered(post.get("title"))), set()).add(post_id)
+        if post.get("slug"):
+            self._by_slug[post["slug"]] = post_id
+
+    def _remove(self, post_id):
+        old = self._posts.pop(post_id, None)
+        if old is None:
+            return
+        self._by_title.get(normalize_title(_rendered(old.get("title"))), set()).discard(post_id)
+        if self._by_slug.get(old.get("slug")) == post_id:
+            del self._by_slug[old["slug"]]
+
+    def _load_cache(self):
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for post in data.get("posts", []):
+                self._store(post)
+            self._etag = data.get("etag")
+            self._last_modified = data.get("last_modified")
+        except (OSError, ValueError) as e:
+            log.warning("Ignoring unreadable cache %s: %s", self.cache_path, e)
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        with self._lock:
+            data = {
+                "base_url": self.base_url,
+                "etag": self._etag,
+                "last_modified": self._last_modified,
+                "posts": list(self._posts.values()),
+            }
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.cache_path)
+
+    # ------------------------------------------------------------- lookups
+
+    def find_by_title(self, title: str) -> list:
+        """Return all posts whose title matches (case/whitespace-insensitive)."""
+        with self._lock:
+            ids = self._by_title.get(normalize_title(title), ())
+            return [self._posts[i] for i in ids]
+
+    def find_by_slug(self, slug: str):
+        """Return the post with the given slug, or None."""
+        with self._lock:
+            post_id = self._by_slug.get(slug)
+            return self._posts.get(post_id) if post_id is not None else None
+
+    def title_exists(self, title: str) -> bool:
+        """Check whether a post with this title already exists."""
+        return bool(self.find_by_title(title))
+
+    def posts(self, status: str = "any", limit: int = None, offset: int = 0) -> list:
+        """Return indexed posts, newest first, optionally filtered by status."""
+        with self._lock:
+            posts = [
+                p for p in self._posts.values()
+                if status == "any" or p.get("status") == status
+            ]
+        posts.sort(key=lambda p: p.get("date_gmt") or "", reverse=True)
+        end = offset + limit if limit is not None else None
+        return posts[offset:end]
+
+    def __len__(self) -> int:
+        return len(self._posts)
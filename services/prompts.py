@@ -0,0 +1,155 @@
+"""
+Prompt Templates - Compiled per-content-type prompts with token budgets.
+Every request shares one static system prompt (so provider-side prompt
+caching can reuse it) and carries only a budget-trimmed copy of the email.
+"""
+import re
+from functools import lru_cache
+from string import Template
+
+# Rough OpenAI-style estimate; good enough for budgeting without a tokenizer
+CHARS_PER_TOKEN = 4
+
+# Static prefix shared by every call - keep it byte-identical across requests
+SYSTEM_PROMPT = (
+    "You are Auto-Content-Bot, a marketing copywriter. "
+    "Write accurate, engaging content based only on the facts in the request. "
+    "Never invent prices, dates or product features. "
+    "Return plain HTML for long-form content and plain text for social posts."
+)
+
+_GREETING_RE = re.compile(r"^(hi|hello|dear|hey|thanks|thank you|best|regards|cheers)\b", re.IGNORECASE)
+# "Price: $199", "- Battery: 5000 mAh" - a short key (up to 4 words) then a value
+_KEY_VALUE_RE = re.compile(r"^(?:[-*•]\s*)?[A-Za-z][\w&/()'-]*(?: [\w&/()'-]+){0,3}:\s+\S")
+_BULLET_RE = re.compile(r"^[-*•]\s")
+# Prices, percentages and numbers with a unit; bare digits (dates, times) do not count
+_FACT_RE = re.compile(
+    r"[$€£¥]\s?\d|\d\s?%|\b\d+(?:[.,]\d+)?\s?(?:usd|eur|gbp|gb|tb|mb|kg|g|lbs?|cm|mm|m|km|in|inch(?:es)?"
+    r"|hours?|hrs?|days?|weeks?|months?|years?|mah|w|v|hz|ghz|mp|px)\b",
+    re.IGNORECASE
+)
+KEY_VALUE_MAX_CHARS = 80
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a string."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def fit_to_budget(text: str, budget: int) -> str:
+    """
+    Shrink an email body to at most `budget` tokens.
+
+    Greetings and sign-offs are dropped first. If that is not enough, the
+    budget is claimed in order by short `Key: value` lines (kept wherever
+    they sit in the email), then bullets and lines with prices, percentages
+    or measured quantities, then everything else. Kept lines stay in their
+    original order.
+    """
+    lines = [" ".join(line.split()) for line in (text or "").splitlines()]
+    lines = [line for line in lines if line]
+    compact = "\n".join(lines)
+    if estimate_tokens(compact) <= budget:
+        return compact
+
+    lines = [line for line in lines if not _GREETING_RE.match(line)]
+    compact = "\n".join(lines)
+    if estimate_tokens(compact) <= budget:
+        return compact
+
+    order = sorted(range(len(lines)), key=lambda i: _line_priority(lines[i]))
+    max_chars = budget * CHARS_PER_TOKEN
+
+    kept, used = set(), 0
+    for i in order:
+        if used + len(lines[i]) + 1 > max_chars:
+            continue
+        kept.add(i)
+        used += len(lines[i]) + 1
+
+    summary = "\n".join(lines[i] for i in sorted(kept))
+    if not summary:
+        summary = compact[:max_chars - 3].rstrip() + "..."
+    return summary
+
+
+def _line_priority(line: str) -> int:
+    """0 = short `Key: value` line, 1 = bullet or fact line, 2 = prose."""
+    if len(line) <= KEY_VALUE_MAX_CHARS and _KEY_VALUE_RE.match(line):
+        return 0
+    if _BULLET_RE.match(line) or _FACT_RE.search(line):
+        return 1
+    return 2
+
+
+class PromptTemplate:
+    """A compiled user-prompt template for one content type."""
+
+    def __init__(self, content_type: str, template: str, input_budget: int, max_output_tokens: int):
+        self.content_type = content_type
+        self.template = Template(template)
+        self.input_budget = input_budget
+        self.max_output_tokens = max_output_tokens
+
+    def render(self, subject: str, body: str, **extra) -> str:
+        """Fill the template with the subject and a budget-trimmed body."""
+        return self.template.substitute(
+            subject=subject,
+            body=fit_to_budget(body, self.input_budget),
+            **extra
+        )
+
+
+PROMPT_TEMPLATES = {
+    "blog_post": PromptTemplate(
+        "blog_post",
+        "Write an SEO-friendly blog post (600-900 words) with a title.\n"
+        "Request: $subject\n---\n$body",
+        input_budget=600,
+        max_output_tokens=1500
+    ),
+    "case_study": PromptTemplate(
+        "case_study",
+        "Write a customer case study (challenge, solution, results) with a title.\n"
+        "Request: $subject\n---\n$body",
+        input_budget=600,
+        max_output_tokens=1500
+    ),
+    "social_post": PromptTemplate(
+        "social_post",
+        "Write a $platform post under 1300 characters with 3 relevant hashtags.\n"
+        "Request: $subject\n---\n$body",
+        input_budget=250,
+        max_output_tokens=400
+    ),
+    "twitter_post": PromptTemplate(
+        "twitter_post",
+        "Write a tweet under 280 characters with 2 hashtags.\n"
+        "Request: $subject\n---\n$body",
+        input_budget=150,
+        max_output_tokens=120
+    ),
+    "product_description": PromptTemplate(
+        "product_description",
+        "Write a product description: headline, 2-sentence description, 4 feature bullets.\n"
+        "Request: $subject\n---\n$body",
+        input_budget=300,
+        max_output_tokens=500
+    ),
+}
+
+
+@lru_cache(maxsize=256)
+def build_messages(content_type: str, subject: str, body: str, platform: str = "LinkedIn") -> tuple:
+    """
+    Chat messages for one section, cached per (type, subject, body, platform).
+    The result is shared between callers and must not be modified.
+    """
+    template = PROMPT_TEMPLATES.get(content_type)
+    if template is None:
+        raise ValueError(f"Unknown content type: {content_type}")
+
+    return (
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": template.render(subject, body, platform=platform)},
+    )
@@ -0,0 +1,249 @@
+"""
+Site Registry - Multi-tenant WordPress site routing.
+Loads client sites from a JSON file (hot-reloaded when it changes) and
+routes each job to its site by subject tag or sender. Every site keeps its
+own pooled HTTP session, concurrency limit, auth check and post index.
+"""
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parseaddr
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+
+from config import Config
+from services.logger import get_logger
+
+log = get_logger(__name__)
+
+DEFAULT_SITE = "default"
+
+_SUBJECT_TAG_RE = re.compile(r"\[(?:site:)?\s*([\w.-]+)\s*\]", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class Site:
+    """Static definition of one WordPress site."""
+    name: str
+    url: str = ""
+    user: str = ""
+    app_password: str = field(default="", repr=False)
+    senders: tuple = ()
+    tags: tuple = ()
+    max_concurrency: int = 4
+    post_index_cache: str = ""
+
+    @property
+    def is_configured(self) -> bool:
+        return all([self.url, self.user, self.app_password])
+
+
+class SiteConnection:
+    """Per-site runtime state shared by every publisher for that site."""
+
+    def __init__(self, site: Site):
+        self.site = site
+        self.auth = HTTPBasicAuth(site.user, site.app_password) if site.is_configured else None
+
+        self.session = requests.Session()
+        self.session.auth = self.auth
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=site.max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # Caps in-flight requests to this site across all jobs/threads
+        self.limit = threading.BoundedSemaphore(site.max_concurrency)
+
+        self._verified_at = 0.0
+        self._verified = False
+        self._verify_lock = threading.Lock()
+        # Created lazily by WordPressPublisher
+        self.post_index = None
+        self.demo_post_index = None
+
+    @property
+    def name(self) -> str:
+        return self.site.name
+
+    @property
+    def base_url(self) -> str:
+        return self.site.url
+
+    def verify(self) -> bool:
+        """
+        Check the site credentials. A success is cached for WP_AUTH_CACHE_TTL
+        seconds; a failure only for WP_AUTH_RETRY_TTL, so one timeout does not
+        keep the site in mock mode.
+        """
+        if not self.site.is_configured:
+            return False
+
+        with self._verify_lock:
+            ttl = Config.WP_AUTH_CACHE_TTL if self._verified else Config.WP_AUTH_RETRY_TTL
+            if self._verified_at and time.monotonic() - self._verified_at < ttl:
+                return self._verified
+
+            try:
+                with self.limit:
+                    response = self.session.get(f"{self.base_url}/users/me", timeout=10)
+                if response.status_code == 200:
+                    user = response.json()
+                    log.info("Site %s connected as: %s", self.name, user.get('name', 'User'))
+                    self._verified = True
+                else:
+                    log.warning("Site %s connection failed (Status: %s)", self.name, response.status_code)
+                    self._verified = False
+            except Exception as e:
+                log.warning("Site %s connection error: %s", self.name, e)
+                self._verified = False
+
+            self._verified_at = time.monotonic()
+            return self._verified
+
+
+class SiteRegistry:
+    """
+    All known sites, keyed by name.
+
+    The `default` site always comes from the single-site `WP_*` settings, so
+    existing deployments keep working without a sites file. The file is
+    re-read when its modification time changes; connections of sites whose
+    definition did not change are kept.
+    """
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self._mtime = None
+        self._checked_at = 0.0
+        self._sites = {}
+        self._default_name = DEFAULT_SITE
+        self._lock = threading.Lock()
+        self._load()
+
+    def _default_site(self) -> Site:
+        return Site(
+            name=DEFAULT_SITE,
+            url=Config.WP_URL,
+            user=Config.WP_USER,
+            app_password=Config.WP_APP_PASSWORD,
+            post_index_cache=Config.WP_POST_INDEX_CACHE
+        )
+
+    def _read_file(self) -> tuple:
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        sites = []
+        for entry in data.get("sites", []):
+            password = entry.get("app_password") or os.getenv(entry.get("app_password_env", ""), "")
+            sites.append(Site(
+                name=entry["name"],
+                url=entry.get("url", ""),
+                user=entry.get("user", ""),
+                app_password=password,
+                senders=tuple(s.lower() for s in entry.get("senders", [])),
+                tags=tuple(t.lower() for t in entry.get("tags", [entry["name"]])),
+                max_concurrency=int(entry.get("max_concurrency", 4)),
+                post_index_cache=entry.get("post_index_cache", "")
+            ))
+        return sites, data.get("default", DEFAULT_SITE)
+
+    def _load(self):
+        definitions = [self._default_site()]
+        default_name = DEFAULT_SITE
+
+        if self.path:
+            try:
+                self._mtime = os.path.getmtime(self.path)
+                file_sites, default_name = self._read_file()
+                definitions.extend(file_sites)
+                log.info("Loaded %d site(s) from %s", len(file_sites), self.path)
+            except (OSError, ValueError, KeyError) as e:
+                log.warning("Could not load %s: %s", self.path, e)
+                if self._sites:
+                    return  # Keep serving the last good configuration
+
+        with self._lock:
+            connections = {}
+            for site in definitions:
+                existing = self._sites.get(site.name)
+                connections[site.name] = existing if existing and existing.site == site else SiteConnection(site)
+            self._sites = connections
+            self._default_name = default_name if default_name in connections else DEFAULT_SITE
+
+    def reload_if_changed(self):
+        """Re-read the sites file if it was modified (checked at most once per second)."""
+        if not self.path or time.monotonic() - self._checked_at < 1.0:
+            return
+        self._checked_at = time.monotonic()
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self._load()
+
+    def get(self, name: str = None) -> SiteConnection:
+        """Site by name (the default site if name is empty). Raises KeyError if unknown."""
+        self.reload_if_changed()
+        with self._lock:
+            return self._sites[name or self._default_name]
+
+    def names(self) -> list:
+        self.reload_if_changed()
+        with self._lock:
+            return list(self._sites)
+
+    def route(self, email_data: dict) -> SiteConnection:
+        """
+        Pick the target site for a job:
+        1. the site whose `senders` match the sender address or domain,
+        2. a subject tag like `[site:acme]` or `[acme]` - only honoured when
+           the sender belongs to no site or to the tagged site, so one
+           client cannot publish to another client's WordPress,
+        3. the default site.
+        """
+        self.reload_if_changed()
+        subject = email_data.get("subject", "")
+        sender = parseaddr(email_data.get("sender", ""))[1].lower()  # "Jane <jane@acme.com>"
+        domain = sender.rsplit("@", 1)[-1]
+
+        with self._lock:
+            connections = list(self._sites.values())
+            default = self._sites[self._default_name]
+
+        by_sender = None
+        for connection in connections:
+            if any(sender == pattern or domain == pattern.lstrip("@") for pattern in connection.site.senders):
+                by_sender = connection
+                break
+
+        for tag in _SUBJECT_TAG_RE.findall(subject):
+            tag = tag.lower()
+            for connection in connections:
+                if tag == connection.name.lower() or tag in connection.site.tags:
+                    if by_sender is None or by_sender is connection:
+                        return connection
+                    log.warning("Ignoring subject tag [%s] from %s: sender belongs to site %s",
+                                tag, sender, by_sender.name)
+                    return by_sender
+
+        return by_sender or default
+
+
+_site_registry = None
+_site_registry_lock = threading.Lock()
+
+
+def get_site_registry() -> SiteRegistry:
+    """Process-wide site registry."""
+    global _site_registry
+    with _site_registry_lock:
+        if _site_registry is None:
+            _site_registry = SiteRegistry(Config.WP_SITES_FILE)
+        return _site_registry
@@ -1,5 +1,9 @@
 import time
 
+from services.logger import SUCCESS, get_logger
+
+log = get_logger(__name__)
+
 class SocialMediaManager:
     """
     Manages postings to social platforms (LinkedIn, X/Twitter, Facebook).
@@ -10,7 +14,7 @@ class SocialMediaManager:
         """
         Simulates posting a status update to LinkedIn via API.
         """
-        print(f"🔗 [LINKEDIN] Preparing to post...")
+        log.info("Posting to LinkedIn")
         
         # Simulate API payload construction
         payload = {
@@ -21,8 +25,8 @@ class SocialMediaManager:
         
         time.sleep(1) # Simulate request time
         
-        print(f"📝 [LINKEDIN] Payload sent: {payload['text']}")
-        print("✅ [LINKEDIN] Post published successfully (HTTP 201 Created).")
+        log.debug("LinkedIn payload: %s", payload)
+        log.log(SUCCESS, "LinkedIn post published (HTTP 201 Created)")
 
     def post_to_twitter(self, content):
         """
@@ -0,0 +1,221 @@
+"""
+Job Tracer - Record and replay every integration call of a pipeline run.
+Traces are append-only JSON lines, one record per call. Replaying a trace
+runs the pipeline against the recorded responses (and optionally the
+recorded latencies), with no network access.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+
+from services.logger import get_logger
+
+log = get_logger(__name__)
+
+
+class ReplayError(Exception):
+    """The pipeline asked for a call that the trace does not contain."""
+
+
+class ReplayedError(Exception):
+    """An error that was raised by the original call, re-raised during replay."""
+
+
+def _encode(value):
+    """JSON fallback for arguments that are not plain data (e.g. service objects)."""
+    return repr(value)
+
+
+def untraced(service):
+    """The real object behind a traced proxy (or the object itself)."""
+    return getattr(service, "__wrapped__", service)
+
+
+class JobTracer:
+    """
+    Appends one job's calls to a trace file.
+
+    Record types (short keys keep the file compact):
+      {"t": "job", "job": id, "at": iso-time, "email": {...}}
+      {"t": "call", "job": id, "n": seq, "svc": name, "fn": method,
+       "args": [...], "kw": {...}, "ret": result, "err": error, "ms": latency}
+      {"t": "attr", "job": id, "n": seq, "svc": name, "fn": attribute, "ret": value}
+      {"t": "end", "job": id, "ms": total, "err": error}
+    """
+
+    def __init__(self, path: str, job_id: str = None, email: dict = None):
+        self.path = path
+        self.job_id = job_id or datetime.now().strftime("%Y%m%d%H%M%S%f")
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._write({"t": "job", "at": datetime.now().isoformat(), "email": email})
+
+    def _write(self, record: dict):
+        """Append one record. A write error disables the tracer instead of failing the job."""
+        record["job"] = self.job_id
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                self._file.write(json.dumps(record, separators=(",", ":"), default=_encode) + "\n")
+                self._file.flush()
+            except (OSError, TypeError, ValueError) as e:
+                log.warning("Trace %s disabled after write error: %s", self.path, e)
+                self._close_file()
+
+    def _close_file(self):
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        self._file = None
+
+    def _next_seq(self) -> int:
+        with self._lock:
+            self._seq += 1
+            return self._seq
+
+    def record(self, service: str, method: str, args, kwargs, result, error, latency_ms: float):
+        self._write({
+            "t": "call", "n": self._next_seq(), "svc": service, "fn": method,
+            "args": list(args), "kw": kwargs, "ret": result,
+            "err": f"{type(error).__name__}: {error}" if error else None,
+            "ms": round(latency_ms, 3)
+        })
+
+    def record_attr(self, service: str, name: str, value):
+        self._write({"t": "attr", "n": self._next_seq(), "svc": service, "fn": name, "ret": value})
+
+    def wrap(self, service, name: str):
+        """Proxy that records every public method call and attribute read."""
+        return TracedService(service, name, self)
+
+    def close(self, error: Exception = None):
+        total_ms = (time.perf_counter() - self._started) * 1000
+        self._write({"t": "end", "ms": round(total_ms, 3), "err": str(error) if error else None})
+        with self._lock:
+            if self._file is not None:
+                self._close_file()
+
+
+class TracedService:
+    """Forwards to the wrapped service and records each interaction."""
+
+    def __init__(self, service, name: str, tracer: JobTracer):
+        self.__wrapped__ = service
+        self._name = name
+        self._tracer = tracer
+
+    def __getattr__(self, attr):
+        value = getattr(self.__wrapped__, attr)
+        if attr.startswith("_"):
+            return value
+        if not callable(value):
+            self._tracer.record_attr(self._name, attr, value)
+            return value
+
+        def traced(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = value(*args, **kwargs)
+            except Exception as e:
+                self._tracer.record(self._name, attr, args, kwargs, None, e,
+                                    (time.perf_counter() - started) * 1000)
+                raise
+            self._tracer.record(self._name, attr, args, kwargs, result, None,
+                                (time.perf_counter() - started) * 1000)
+            return result
+
+        return traced
+
+
+class TraceReplayer:
+    """
+    Serves recorded responses for one job of a trace file.
+
+    Calls are matched per (service, method) in recorded order. Each replayed
+    call sleeps for its recorded latency times `latency_scale` (0 = instant).
+    """
+
+    def __init__(self, path: str, job_id: str = None, latency_scale: float = 1.0):
+        self.path = path
+        self.latency_scale = latency_scale
+        self.email = None
+
+        jobs = defaultdict(list)
+        order = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if record["job"] not in jobs:
+                    order.append(record["job"])
+                jobs[record["job"]].append(record)
+
+        if not order:
+            raise ReplayError(f"Trace {path} is empty")
+        self.job_id = job_id or order[-1]  # Most recent job by default
+        if self.job_id not in jobs:
+            raise ReplayError(f"Job {self.job_id} not found in {path}")
+
+        self._queues = defaultdict(deque)
+        self._lock = threading.Lock()
+        for record in jobs[self.job_id]:
+            if record["t"] == "job":
+                self.email = record.get("email")
+            elif record["t"] in ("call", "attr"):
+                self._queues[(record["svc"], record["fn"])].append(record)
+
+        log.info("Replaying job %s: %d recorded calls, latency x%s",
+                 self.job_id, sum(len(q) for q in self._queues.values()), latency_scale)
+
+    def next(self, service: str, method: str) -> dict:
+        with self._lock:
+            queue = self._queues.get((service, method))
+            if not queue:
+                raise ReplayError(f"Trace has no more {service}.{method} calls")
+            return queue.popleft()
+
+    def service(self, name: str):
+        """Stand-in for a real service that answers from the trace."""
+        return ReplayService(name, self)
+
+    def remaining(self) -> int:
+        """Recorded calls that were not consumed (a sign the run diverged)."""
+        with self._lock:
+            return sum(len(q) for q in self._queues.values())
+
+
+class ReplayService:
+    """Answers method calls and attribute reads from recorded trace entries."""
+
+    def __init__(self, name: str, replayer: TraceReplayer):
+        self._name = name
+        self._replayer = replayer
+
+    def __getattr__(self, attr):
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+
+        # Attribute reads were recorded as "attr" entries, method calls as "call"
+        record = self._replayer.next(self._name, attr)
+        if record["t"] == "attr":
+            return record["ret"]
+
+        def replayed(*args, **kwargs):
+            if self._replayer.latency_scale:
+                time.sleep(record["ms"] / 1000 * self._replayer.latency_scale)
+            if record["err"]:
+                raise ReplayedError(record["err"])
+            return record["ret"]
+
+        return replayed
@@ -1,6 +1,10 @@
 import time
 import random
 
+from services.logger import SUCCESS, get_logger
+
+log = get_logger(__name__)
+
 class WordPressPublisher:
     """
     Handles interactions with the WordPress REST API.
@@ -15,10 +19,7 @@ class WordPressPublisher:
         """
         Simulates creating a draft post on the WordPress site.
         """
-        print(f"\n--- 📡 CONNECTING TO WORDPRESS ---")
-        print(f"Target Endpoint: {self.base_url}")
-        print(f"Action: Create Draft Post")
-        print(f"Post Title: {title}")
+        log.info("Creating draft at %s: %s", self.base_url, title)
         
         # Simulate network latency
         time.sleep(1.5) 
@@ -27,8 +28,6 @@ class WordPressPublisher:
         mock_id = random.randint(1000, 9999)
         mock_link = f"https://anotherway0.wordpress.com/?p={mock_id}&preview=true"
         
-        print(f"✅ [WORDPRESS] Draft created successfully. (ID: {mock_id})")
-        print(f"🔗 Preview Link: {mock_link}")
-        print("-----------------------------------\n")
+        log.log(SUCCESS, "Draft created (ID: %s) %s", mock_id, mock_link)
         
         return mock_link
@@ -4,56 +4,123 @@ Handles creating posts, drafts, and managing content on WordPress sites.
 """
 import time
 import random
-import requests
-from requests.auth import HTTPBasicAuth
+import threading
+import mimetypes
+from datetime import datetime, timezone
 from config import Config
+from services.post_index import PostIndex
+from services.dedup_index import get_dedup_index
+from services.site_registry import SiteConnection, get_site_registry
+from services.logger import SUCCESS, get_logger
+
+log = get_logger(__name__)
+
+_post_index_lock = threading.Lock()
+
+MOCK_POSTS = [
+    {"id": 1001, "slug": "sample-post-1", "title": {"rendered": "Sample Post 1"},
+     "status": "publish", "date_gmt": "2025-01-01T09:00:00", "modified_gmt": "2025-01-01T09:00:00"},
+    {"id": 1002, "slug": "draft-post", "title": {"rendered": "Draft Post"},
+     "status": "draft", "date_gmt": "2025-01-02T09:00:00", "modified_gmt": "2025-01-02T09:00:00"}
+]
+
+
+def _dedup_hooks(site_name: str):
+    """Post index hooks that keep a site's published bodies in its duplicate index."""
+    def fingerprint(post: dict):
+        content = post.get("content") or {}
+        text = content.get("rendered", "") if isinstance(content, dict) else content
+        if text.strip():
+            title = (post.get("title") or {}).get("rendered", "")
+            get_dedup_index(site_name, "wordpress").add(text, label=f"[{site_name}] {title}", key=f"wp:{post['id']}")
+
+    def forget(post_id):
+        get_dedup_index(site_name, "wordpress").remove(f"wp:{post_id}")
+
+    return fingerprint, forget
 
 
 class WordPressPublisher:
     """
     WordPress REST API integration for content publishing.
     Supports draft creation, publishing, and content management.
+
+    Bound to one site from the site registry (the `default` site built from
+    `WP_*` settings unless another is given). Requests go through the site's
+    pooled session and concurrency limit.
     """
     
-    def __init__(self):
-        self.base_url = Config.WP_URL
-        self.auth = None
+    def __init__(self, site: SiteConnection = None):
+        self.site = site or get_site_registry().get()
+        self.base_url = self.site.base_url
+        self.auth = self.site.auth
+        self.session = self.site.session
         self.use_real_api = False
+        self.last_post_id = None  # ID of the most recent post created by this instance
         
-        if Config.is_wordpress_configured() and not Config.DEMO_MODE:
-            self.auth = HTTPBasicAuth(Config.WP_USER, Config.WP_APP_PASSWORD)
+        if self.site.site.is_configured and not Config.DEMO_MODE:
             self._verify_connection()
         else:
-            print("📝 [WORDPRESS] Running in DEMO mode.")
+            log.debug("Site %s running in DEMO mode", self.site.name)
+
+    @property
+    def post_index(self) -> PostIndex:
+        """Shared local index of this site's posts (see `services.post_index`)."""
+        attr = "post_index" if self.use_real_api else "demo_post_index"
+        with _post_index_lock:
+            index = getattr(self.site, attr)
+            if index is None:
+                if self.use_real_api:
+                    on_content, on_remove = _dedup_hooks(self.site.name) if Config.DEDUP_ENABLED else (None, None)
+                    index = PostIndex(
+                        self.base_url,
+                        auth=self.auth,
+                        max_workers=min(Config.WP_INDEX_WORKERS, self.site.site.max_concurrency),
+                        cache_path=self.site.site.post_index_cache,
+                        session=self.session,
+                        limit=self.site.limit,
+                        reconcile_interval=Config.WP_INDEX_RECONCILE_INTERVAL,
+                        on_content=on_content,
+                        on_remove=on_remove
+                    )
+                else:
+                    index = PostIndex(self.base_url)
+                    for post in MOCK_POSTS:
+                        index.add(dict(post))
+                setattr(self.site, attr, index)
+        return index
+
+    def sync_post_index(self) -> PostIndex:
+        """Refresh the post index (full sync first time, incremental after)."""
+        index = self.post_index
+        if self.use_real_api:
+            try:
+                index.sync()
+            except Exception as e:
+                log.warning("Post index sync failed for %s: %s", self.site.name, e)
+        return index
+
+    def find_posts_by_title(self, title: str) -> list:
+        """Look up existing posts with the same title."""
+        return self.sync_post_index().find_by_title(title)
+
+    def find_post_by_slug(self, slug: str):
+        """Look up an existing post by slug."""
+        return self.sync_post_index().find_by_slug(slug)
 
     def _verify_connection(self):
-        """Verify WordPress API connection."""
-        try:
-            response = requests.get(
-                f"{self.base_url}/users/me",
-                auth=self.auth,
-                timeout=10
-            )
-            if response.status_code == 200:
-                user = response.json()
-                print(f"📝 [WORDPRESS] Connected as: {user.get('name', 'User')}")
-                self.use_real_api = True
-            else:
-                print(f"⚠️ [WORDPRESS] Connection failed (Status: {response.status_code})")
-        except Exception as e:
-            print(f"⚠️ [WORDPRESS] Connection error: {e}")
+        """Verify WordPress API connection (cached per site)."""
+        self.use_real_api = self.site.verify()
 
-    def create_draft(self, title: str, content: str, excerpt: str = "") -> str:
+    def create_draft(self, title: str, content: str, excerpt: str = "", featured_media: int = None) -> str:
         """
         Create a draft post on WordPress.
         Returns the preview link.
         """
-        print(f"\n--- 📡 CONNECTING TO WORDPRESS ---")
-        print(f"Action: Create Draft Post")
-        print(f"Post Title: {title}")
+        log.info("Creating draft on %s: %s", self.site.name, title)
         
         if self.use_real_api:
-            return self._create_real_post(title, content, excerpt, status="draft")
+            return self._create_real_post(title, content, excerpt, status="draft", featured_media=featured_media)
         else:
             return self._create_mock_post(title, "draft")
 
@@ -62,15 +129,15 @@ class WordPressPublisher:
         Publish a post directly to WordPress.
         Returns the public link.
         """
-        print(f"\n--- 📡 PUBLISHING TO WORDPRESS ---")
-        print(f"Post Title: {title}")
+        log.info("Publishing post on %s: %s", self.site.name, title)
         
         if self.use_real_api:
             return self._create_real_post(title, content, excerpt, status="publish")
         else:
             return self._create_mock_post(title, "publish")
 
-    def _create_real_post(self, title: str, content: str, excerpt: str, status: str) -> str:
+    def _create_real_post(self, title: str, content: str, excerpt: str, status: str,
+                          featured_media: int = None) -> str:
         """Create a real post via WordPress REST API."""
         try:
             payload = {
@@ -80,34 +147,36 @@ class WordPressPublisher:
                 "status": status,
                 "format": "standard"
             }
+            if featured_media:
+                payload["featured_media"] = featured_media
             
-            response = requests.post(
-                f"{self.base_url}/posts",
-                auth=self.auth,
-                json=payload,
-                timeout=30
-            )
+            with self.site.limit:
+                response = self.session.post(
+                    f"{self.base_url}/posts",
+                    json=payload,
+                    timeout=30
+                )
             
             if response.status_code in [200, 201]:
                 post = response.json()
                 link = post.get('link', '')
                 post_id = post.get('id', '')
+                self.last_post_id = post_id
+                self.post_index.add(post)
                 
                 if status == "draft":
                     preview_link = f"{link}?preview=true"
-                    print(f"✅ [WORDPRESS] Draft created (ID: {post_id})")
-                    print(f"🔗 Preview: {preview_link}")
+                    log.log(SUCCESS, "Draft created (ID: %s) %s", post_id, preview_link)
                     return preview_link
                 else:
-                    print(f"✅ [WORDPRESS] Post published (ID: {post_id})")
-                    print(f"🔗 Live URL: {link}")
+                    log.log(SUCCESS, "Post published (ID: %s) %s", post_id, link)
                     return link
             else:
-                print(f"❌ [WORDPRESS] Failed: {response.status_code} - {response.text}")
+                log.error("Creating post failed: %s - %s", response.status_code, response.text)
                 return self._create_mock_post(title, status)
                 
         except Exception as e:
-            print(f"❌ [WORDPRESS] Error: {e}")
+            log.error("Creating post failed: %s", e)
             return self._create_mock_post(title, status)
 
     def _create_mock_post(self, title: str, status: str) -> str:
@@ -115,23 +184,30 @@ class WordPressPublisher:
         time.sleep(1.5)  # Simulate network latency
         
         mock_id = random.randint(1000, 9999)
+        self.last_post_id = mock_id
         base_domain = self.base_url.replace('/wp-json/wp/v2', '') if self.base_url else 'https://demo.wordpress.com'
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+        self.post_index.add({
+            "id": mock_id,
+            "slug": f"post-{mock_id}",
+            "title": {"rendered": title},
+            "status": status,
+            "date_gmt": now,
+            "modified_gmt": now
+        })
         
         if status == "draft":
             mock_link = f"{base_domain}/?p={mock_id}&preview=true"
-            print(f"✅ [WORDPRESS] Draft created (ID: {mock_id}) - DEMO MODE")
+            log.log(SUCCESS, "Draft created (ID: %s) %s - DEMO MODE", mock_id, mock_link)
         else:
             mock_link = f"{base_domain}/post-{mock_id}/"
-            print(f"✅ [WORDPRESS] Post published (ID: {mock_id}) - DEMO MODE")
-        
-        print(f"🔗 Link: {mock_link}")
-        print("-----------------------------------\n")
+            log.log(SUCCESS, "Post published (ID: %s) %s - DEMO MODE", mock_id, mock_link)
         
         return mock_link
 
     def update_post(self, post_id: int, title: str = None, content: str = None, status: str = None) -> bool:
         """Update an existing post."""
-        print(f"📝 [WORDPRESS] Updating post {post_id}...")
+        log.info("Updating post %s", post_id)
         
         if self.use_real_api:
             try:
@@ -143,88 +219,97 @@ class WordPressPublisher:
                 if status:
                     payload['status'] = status
                 
-                response = requests.patch(
-                    f"{self.base_url}/posts/{post_id}",
-                    auth=self.auth,
-                    json=payload,
-                    timeout=30
-                )
+                with self.site.limit:
+                    response = self.session.patch(
+                        f"{self.base_url}/posts/{post_id}",
+                        json=payload,
+                        timeout=30
+                    )
                 
                 if response.status_code == 200:
-                    print(f"✅ [WORDPRESS] Post {post_id} updated successfully.")
+                    log.log(SUCCESS, "Post %s updated", post_id)
                     return True
                 else:
-                    print(f"❌ [WORDPRESS] Update failed: {response.status_code}")
+                    log.error("Updating post %s failed: %s", post_id, response.status_code)
                     return False
             except Exception as e:
-                print(f"❌ [WORDPRESS] Error: {e}")
+                log.error("Updating post %s failed: %s", post_id, e)
                 return False
         else:
             time.sleep(0.5)
-            print(f"✅ [WORDPRESS] Post {post_id} updated (DEMO MODE)")
+            log.log(SUCCESS, "Post %s updated (DEMO MODE)", post_id)
             return True
 
-    def get_posts(self, status: str = "any", per_page: int = 10) -> list:
-        """Get list of posts from WordPress."""
-        if self.use_real_api:
-            try:
-                params = {"per_page": per_page}
-                if status != "any":
-                    params["status"] = status
-                
-                response = requests.get(
-                    f"{self.base_url}/posts",
-                    auth=self.auth,
-                    params=params,
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    return response.json()
-            except Exception as e:
-                print(f"⚠️ [WORDPRESS] Error fetching posts: {e}")
-        
-        # Mock posts
-        return [
-            {"id": 1001, "title": {"rendered": "Sample Post 1"}, "status": "publish"},
-            {"id": 1002, "title": {"rendered": "Draft Post"}, "status": "draft"}
-        ]
+    def get_posts(self, status: str = "any", per_page: int = 10, page: int = 1) -> list:
+        """
+        Get list of posts from WordPress.
+        Served from the local post index, which is refreshed incrementally.
+        """
+        index = self.sync_post_index()
+        return index.posts(status, limit=per_page, offset=(page - 1) * per_page)
 
     def upload_media(self, file_path: str, title: str = "") -> dict:
         """
         Upload media (images) to WordPress.
         Returns media object with ID and URL.
         """
-        print(f"📷 [WORDPRESS] Uploading media: {file_path}")
+        log.info("Uploading media: %s", file_path)
         
         if self.use_real_api:
             try:
                 with open(file_path, 'rb') as f:
                     filename = file_path.split('/')[-1]
                     headers = {
-                        'Content-Disposition': f'attachment; filename="{filename}"'
+                        'Content-Disposition': f'attachment; filename="{filename}"',
+                        'Content-Type': mimetypes.guess_type(filename)[0] or 'application/octet-stream'
                     }
                     
-                    response = requests.post(
-                        f"{self.base_url}/media",
-                        auth=self.auth,
-                        headers=headers,
-                        data=f,
-                        timeout=60
-                    )
+                    with self.site.limit:
+                        response = self.session.post(
+                            f"{self.base_url}/media",
+                            headers=headers,
+                            data=f,
+                            timeout=60
+                        )
                     
                     if response.status_code in [200, 201]:
                         media = response.json()
-                        print(f"✅ [WORDPRESS] Media uploaded (ID: {media['id']})")
+                        log.log(SUCCESS, "Media uploaded (ID: %s)", media['id'])
                         return {
                             "id": media['id'],
                             "url": media['source_url']
                         }
             except Exception as e:
-                print(f"❌ [WORDPRESS] Media upload failed: {e}")
+                log.error("Media upload failed: %s", e)
         
         # Mock response
         return {
             "id": random.randint(100, 999),
             "url": f"https://demo.wordpress.com/wp-content/uploads/sample.jpg"
         }
+
+    def attach_media(self, post_id: int, media_ids: list) -> bool:
+        """Attach uploaded media to a post (sets each item's parent post)."""
+        log.info("Attaching %d media item(s) to post %s", len(media_ids), post_id)
+
+        if not self.use_real_api:
+            time.sleep(0.2)
+            log.log(SUCCESS, "Media attached (DEMO MODE)")
+            return True
+
+        ok = True
+        for media_id in media_ids:
+            try:
+                with self.site.limit:
+                    response = self.session.post(
+                        f"{self.base_url}/media/{media_id}",
+                        json={"post": post_id},
+                        timeout=30
+                    )
+                if response.status_code != 200:
+                    log.error("Attaching media %s failed: %s", media_id, response.status_code)
+                    ok = False
+            except Exception as e:
+                log.error("Attaching media %s failed: %s", media_id, e)
+                ok = False
+        return ok
@@ -0,0 +1,84 @@
+"""Tests for the SimHash duplicate index: lookup tables, keyed entries and the on-disk log."""
+import random
+
+import pytest
+
+from services.dedup_index import MAX_DISTANCE, DedupIndex, hamming_distance, simhash
+
+
+def flip_bits(fingerprint: int, count: int, rng: random.Random) -> int:
+    for bit in rng.sample(range(64), count):
+        fingerprint ^= 1 << bit
+    return fingerprint
+
+
+@pytest.mark.parametrize("max_distance", range(MAX_DISTANCE + 1))
+def test_lookup_matches_brute_force(max_distance):
+    rng = random.Random(max_distance)
+    index = DedupIndex(max_distance=max_distance)
+    stored = [rng.getrandbits(64) for _ in range(2000)]
+    for i, fingerprint in enumerate(stored):
+        index.add_fingerprint(fingerprint, label=str(i))
+
+    # Queries at every distance up to max_distance + 2 from a stored entry
+    for i in range(300):
+        query = flip_bits(stored[i], i % (max_distance + 3), rng)
+        expected = min(hamming_distance(query, fp) for fp in stored)
+        match = index.find_fingerprint(query)
+        if expected <= max_distance:
+            assert match is not None and match["distance"] == expected
+        else:
+            assert match is None
+
+
+def test_find_text_and_exclude():
+    body = " ".join(f"word{i}" for i in range(300))
+    index = DedupIndex(max_distance=5)
+    index.add(body, label="original", key="wp:1")
+
+    edited = body.replace("word7 ", "other ")
+    distance = hamming_distance(simhash(body), simhash(edited))
+    assert index.find(edited) == {"label": "original", "distance": distance}
+    assert index.find(body, exclude=["wp:1"]) is None
+    assert index.find("") is None
+
+
+def test_keyed_replace_and_remove_survive_reload(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    index = DedupIndex(max_distance=3, path=path)
+    index.add_fingerprint(0x1111, label="first", key="wp:1")
+    index.add_fingerprint(0x2222, label="second", key="wp:2")
+    index.add_fingerprint(0xFFFF0000FFFF0000, label="first (edited)", key="wp:1")
+    index.add_fingerprint(0x3333, label="unkeyed")
+    assert index.remove("wp:2")
+    assert not index.remove("wp:2")
+    assert len(index) == 2
+
+    reloaded = DedupIndex(max_distance=3, path=path)
+    assert len(reloaded) == 2
+    assert reloaded.find_fingerprint(0x1111) is None
+    assert reloaded.find_fingerprint(0x2222) is None
+    assert reloaded.find_fingerprint(0xFFFF0000FFFF0000)["label"] == "first (edited)"
+    assert reloaded.find_fingerprint(0x3333)["label"] == "unkeyed"
+
+
+def test_compaction_keeps_only_live_entries(tmp_path):
+    path = tmp_path / "index.jsonl"
+    rng = random.Random(7)
+    index = DedupIndex(max_distance=5, path=str(path))
+    for _ in range(1200):
+        index.add_fingerprint(rng.getrandbits(64), label="churn", key="wp:1")
+    live = [rng.getrandbits(64) for _ in range(10)]
+    for i, fingerprint in enumerate(live):
+        index.add_fingerprint(fingerprint, label=f"post {i}", key=f"wp:{i + 2}")
+    index.remove("wp:2")
+
+    # The log was rewritten with live entries only, then kept appending
+    records = len(path.read_text().splitlines())
+    assert records < 1200
+    assert len(index) == 10
+
+    reloaded = DedupIndex(max_distance=5, path=str(path))
+    assert len(reloaded) == 10
+    assert reloaded.find_fingerprint(live[0]) is None  # Removed (wp:2)
+    assert reloaded.find_fingerprint(live[3])["label"] == "post 3"
@@ -0,0 +1,157 @@
+"""Tests for the WordPress post index against a fake REST API session."""
+import math
+
+from services.post_index import PostIndex
+
+
+class FakeResponse:
+    def __init__(self, posts, total_pages):
+        self.status_code = 200
+        self.headers = {"X-WP-TotalPages": str(total_pages)}
+        self._posts = posts
+
+    def json(self):
+        return [dict(post) for post in self._posts]
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    """Serves `GET /posts` with the filters PostIndex uses."""
+
+    def __init__(self):
+        self.posts = {}
+        self.requests = []
+
+    def put(self, post_id, title, modified, status="publish"):
+        self.posts[post_id] = {
+            "id": post_id, "slug": f"post-{post_id}", "title": {"rendered": title},
+            "status": status, "date_gmt": modified, "modified_gmt": modified,
+        }
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requests.append(params)
+        posts = [p for p in self.posts.values() if p["status"] != "trash"]  # status=any
+        if "modified_after" in params:
+            after = params["modified_after"].rstrip("Z")
+            posts = [p for p in posts if p["modified_gmt"] > after]  # exclusive, like WordPress
+        if "include" in params:
+            ids = {int(i) for i in params["include"].split(",")}
+            posts = [p for p in posts if p["id"] in ids]
+        posts.sort(key=lambda p: p["modified_gmt"], reverse=True)
+
+        per_page, page = params["per_page"], params["page"]
+        total_pages = max(1, math.ceil(len(posts) / per_page))
+        return FakeResponse(posts[(page - 1) * per_page:page * per_page], total_pages)
+
+
+def make_index(session, **kwargs):
+    return PostIndex("https://example.com/wp-json/wp/v2", session=session, per_page=2, **kwargs)
+
+
+def test_full_sync_fetches_every_page():
+    session = FakeSession()
+    for i in range(1, 6):
+        session.put(i, f"Post {i}", f"2025-01-0{i}T09:00:00")
+
+    index = make_index(session)
+    assert index.sync() == 5
+    assert len(index) == 5
+    assert index.title_exists("post 3")
+    assert index.find_by_slug("post-5")["id"] == 5
+    assert [p["id"] for p in index.posts(limit=2)] == [5, 4]
+
+
+def test_incremental_sync_picks_up_new_and_edited_posts():
+    session = FakeSession()
+    session.put(1, "First", "2025-01-01T09:00:00")
+    index = make_index(session)
+    index.sync()
+
+    session.put(1, "First (edited)", "2025-01-02T09:00:00")
+    session.put(2, "Second", "2025-01-02T10:00:00")
+    assert index.sync() == 2
+    assert index.title_exists("First (edited)")
+    assert not index.title_exists("First")
+    assert index.title_exists("Second")
+
+    # Nothing changed: posts in the overlap window are refetched but not counted
+    assert index.sync() == 0
+
+
+def test_incremental_sync_catches_edits_in_the_same_second():
+    session = FakeSession()
+    session.put(1, "First", "2025-01-01T09:00:00")
+    index = make_index(session)
+    index.sync()
+
+    session.put(2, "Same second", "2025-01-01T09:00:00")
+    index.sync()
+    assert index.title_exists("Same second")
+
+
+def test_add_does_not_move_the_sync_watermark():
+    session = FakeSession()
+    session.put(1, "Old", "2025-01-01T09:00:00")
+    index = make_index(session)
+    index.sync()
+
+    # An editor publishes at 10:00, then the bot's own draft (11:00) is added locally
+    session.put(2, "Editor Post", "2025-01-01T10:00:00")
+    session.put(3, "Bot Draft", "2025-01-01T11:00:00", status="draft")
+    index.add(dict(session.posts[3]))
+    assert index.title_exists("Bot Draft")
+
+    index.sync()
+    assert index.title_exists("Editor Post")
+
+
+def test_reconcile_drops_trashed_and_deleted_posts():
+    session = FakeSession()
+    for i in range(1, 4):
+        session.put(i, f"Post {i}", f"2025-01-0{i}T09:00:00")
+    index = make_index(session, reconcile_interval=0)
+    index.sync()
+
+    session.posts[1]["status"] = "trash"
+    del session.posts[2]
+    assert index.sync() == 2
+    assert not index.title_exists("Post 1")
+    assert index.find_by_slug("post-2") is None
+    assert index.title_exists("Post 3")
+
+
+def test_cache_round_trip(tmp_path):
+    cache_path = tmp_path / "nested" / "index.json"
+    session = FakeSession()
+    session.put(1, "Cached", "2025-01-01T09:00:00")
+    make_index(session, cache_path=str(cache_path)).sync()
+
+    restored = make_index(FakeSession(), cache_path=str(cache_path))
+    assert restored.is_synced
+    assert restored.title_exists("Cached")
+
+
+def test_content_is_fetched_in_the_background():
+    session = FakeSession()
+    for i in range(1, 4):
+        session.put(i, f"Post {i}", f"2025-01-0{i}T09:00:00")
+        session.posts[i]["content"] = {"rendered": f"<p>Body {i}</p>"}
+
+    seen = {}
+    index = make_index(session, on_content=lambda post: seen.update({post["id"]: post["content"]}))
+    index.sync()
+    index.wait_for_content()
+
+    # The sync itself never downloads bodies; only the batched backfill does
+    listing = [params for params in session.requests if "include" not in params]
+    assert listing and all("content" not in params["_fields"] for params in listing)
+    assert seen == {i: {"rendered": f"<p>Body {i}</p>"} for i in range(1, 4)}
+    assert "content" not in index.find_by_slug("post-1")
+
+    # Unchanged posts from the overlap window are not fetched again
+    seen.clear()
+    index.sync()
+    index.wait_for_content()
+    assert seen == {}
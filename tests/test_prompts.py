@@ -0,0 +1,37 @@
+"""Tests for prompt budgeting."""
+import pytest
+
+from services.prompts import estimate_tokens, fit_to_budget
+
+
+def long_email() -> str:
+    chatter = [
+        f"On day {i} we met at 10:{i % 60:02d} and talked through item {i} of the launch plan in detail."
+        for i in range(1, 198)
+    ]
+    return "\n".join(
+        ["Hi team,"] + chatter + [
+            "- Battery: 5000 mAh",
+            "Price: $199",
+            "Thanks!",
+        ]
+    )
+
+
+@pytest.mark.parametrize("budget", [150, 600])
+def test_trailing_facts_survive_trimming(budget):
+    summary = fit_to_budget(long_email(), budget)
+
+    assert estimate_tokens(summary) <= budget
+    assert "Price: $199" in summary
+    assert "- Battery: 5000 mAh" in summary
+    assert "Hi team," not in summary
+
+
+def test_kept_lines_stay_in_order():
+    summary = fit_to_budget(long_email(), 150).splitlines()
+    assert summary[-2:] == ["- Battery: 5000 mAh", "Price: $199"]
+
+
+def test_short_email_is_only_compacted():
+    assert fit_to_budget("Hello   there\n\n\nPrice:  $5", 100) == "Hello there\nPrice: $5"